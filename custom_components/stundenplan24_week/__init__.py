@@ -8,6 +8,9 @@ from homeassistant.const import Platform
 
 from .const import DOMAIN
 from .coordinator import SPlanCoordinator
+from .hub import async_get_hub, async_release_hub
+from .store import SnapshotStore
+from .week_api import async_register_api
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -16,14 +19,32 @@ PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.NUMBER]
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up stundenplan24_week from a config entry."""
-    coordinator = SPlanCoordinator(hass, entry)
-    await coordinator.async_config_entry_first_refresh()
+    hub = async_get_hub(hass, entry)
+    coordinator = SPlanCoordinator(hass, entry, hub=hub)
+    try:
+        await hub.async_load_responses()
+        # Letzten Stand sofort anzeigen und im Hintergrund revalidieren;
+        # nur ohne Snapshot blockiert der Setup auf den ersten Refresh.
+        restored = await coordinator.async_restore_snapshot()
+        if not restored:
+            await coordinator.async_config_entry_first_refresh()
+    except Exception:
+        async_release_hub(hass, entry)
+        raise
 
     hass.data.setdefault(DOMAIN, {})
     # IMPORTANT: keep backwards compatible shape: hass.data[DOMAIN][entry_id] == coordinator
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    async_register_api(hass)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    if restored:
+        entry.async_create_background_task(
+            hass,
+            coordinator.async_refresh(),
+            f"{DOMAIN}_revalidate_{entry.entry_id}",
+        )
     return True
 
 
@@ -31,4 +52,10 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
+        async_release_hub(hass, entry)
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop the persisted snapshot of a removed entry."""
+    await SnapshotStore(hass, entry.entry_id).async_remove()
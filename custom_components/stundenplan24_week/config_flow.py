@@ -14,12 +14,20 @@ CONF_SHOW_ROOM = "show_room"
 CONF_SHOW_TEACHER = "show_teacher"
 
 CONF_UPDATE_MINUTES = "update_minutes"
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_LEAN_ATTRIBUTES = "lean_attributes"
+CONF_PROBE_WEEKS = "probe_weeks"
+CONF_PROCESS_POOL = "process_pool"
 CONF_WPLAN_ENABLED = "wplan_enabled"
 CONF_WPLAN_DAYS = "wplan_days"
 
 DEFAULT_SHOW_ROOM = True
 DEFAULT_SHOW_TEACHER = False
 DEFAULT_UPDATE_MINUTES = 360
+DEFAULT_ADAPTIVE_POLLING = True
+DEFAULT_LEAN_ATTRIBUTES = False
+DEFAULT_PROBE_WEEKS = 0
+DEFAULT_PROCESS_POOL = False
 DEFAULT_WPLAN_ENABLED = False
 DEFAULT_WPLAN_DAYS = 3
 
@@ -86,6 +94,22 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     CONF_UPDATE_MINUTES,
                     default=int(options.get(CONF_UPDATE_MINUTES, DEFAULT_UPDATE_MINUTES)),
                 ): vol.All(vol.Coerce(int), vol.Range(min=5, max=1440)),
+                vol.Optional(
+                    CONF_ADAPTIVE_POLLING,
+                    default=bool(options.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING)),
+                ): bool,
+                vol.Optional(
+                    CONF_LEAN_ATTRIBUTES,
+                    default=bool(options.get(CONF_LEAN_ATTRIBUTES, DEFAULT_LEAN_ATTRIBUTES)),
+                ): bool,
+                vol.Optional(
+                    CONF_PROBE_WEEKS,
+                    default=int(options.get(CONF_PROBE_WEEKS, DEFAULT_PROBE_WEEKS)),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=2)),
+                vol.Optional(
+                    CONF_PROCESS_POOL,
+                    default=bool(options.get(CONF_PROCESS_POOL, DEFAULT_PROCESS_POOL)),
+                ): bool,
                 vol.Optional(
                     CONF_WPLAN_ENABLED,
                     default=bool(options.get(CONF_WPLAN_ENABLED, DEFAULT_WPLAN_ENABLED)),
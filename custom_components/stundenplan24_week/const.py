@@ -1,2 +1,14 @@
 DOMAIN = "stundenplan24_week"
 PLATFORMS = ["sensor"]
+
+# hass.data[DOMAIN][DATA_HUBS] -> {hub_key: SchoolHub}
+DATA_HUBS = "hubs"
+
+# hass.data[DOMAIN][DATA_SCHEDULER] -> RequestScheduler (gemeinsam für alle Einträge)
+DATA_SCHEDULER = "scheduler"
+
+# hass.data[DOMAIN][DATA_API] -> True, sobald Wochen-View + WebSocket-Befehl registriert sind
+DATA_API = "api"
+
+# hass.data[DOMAIN][DATA_PROCESS_POOL] -> ProcessPoolExecutor (nur mit Option process_pool)
+DATA_PROCESS_POOL = "process_pool"
@@ -1,23 +1,37 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import json
 import logging
 import re
-from xml.etree import ElementTree as ET
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .parser import parse_plan_klassen_xml
-from .parser_wplan import parse_wplan_day_xml_lessons, parse_wplan_xml
+from .const import DOMAIN
+from .parser import class_key, index_plan_klassen_xml
+from .parser_wdatenk import parse_splankl_basis, parse_splankl_sw_for_target
+from .parser_wplan import index_wplan_day_xml_lessons, index_wplan_xml
 from .parser_wplan_html import parse_wplan_html_to_rows
-from .stundenplan24_api import Stundenplan24Api
+from .hub import SchoolHub
+from .merge import MergedWeek, _norm_ts, merge_week, rows_to_table, text_cache_stats
+from .schedule import SchoolWeekIndex, lesson_window, next_poll_interval, school_week_ranges
+from .scheduler import PRIORITY_BACKGROUND, PRIORITY_CURRENT, request_priority
+from .store import SnapshotStore
+from .stundenplan24_api import NotFoundError
+from .ttl_cache import TtlLruCache
 
 _LOGGER = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
+_RE_ZEITSTEMPEL = re.compile(r"<zeitstempel>(.*?)</zeitstempel>", re.IGNORECASE | re.DOTALL)
+
 CONF_SCHOOL_ID = "school_id"
 CONF_TARGET = "target"
 CONF_SHOW_ROOM = "show_room"
@@ -26,6 +40,12 @@ CONF_SHOW_TEACHER = "show_teacher"
 CONF_UPDATE_MINUTES = "update_minutes"
 DEFAULT_UPDATE_MINUTES = 360  # alle 6h
 
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+DEFAULT_ADAPTIVE_POLLING = True
+
+CONF_LEAN_ATTRIBUTES = "lean_attributes"
+DEFAULT_LEAN_ATTRIBUTES = False
+
 CONF_WPLAN_ENABLED = "wplan_enabled"
 CONF_WPLAN_DAYS = "wplan_days"
 CONF_SHOW_SUB_TEXT = "show_substitution_text"
@@ -33,6 +53,31 @@ CONF_SHOW_SUB_TEXT = "show_substitution_text"
 DEFAULT_WPLAN_ENABLED = False
 DEFAULT_WPLAN_DAYS = 3
 
+# Nachbarwochen, die jeder Refresh mitlädt (je Richtung); alle anderen Wochen
+# werden erst bei Bedarf gemergt (Wochen-API, Wochen-Offset)
+CONF_PROBE_WEEKS = "probe_weeks"
+DEFAULT_PROBE_WEEKS = 0
+MAX_PROBE_WEEKS = 2
+# Eigene Revalidierungs-Kadenz der Nachbarwochen (die gewählte Woche folgt dem Refresh)
+PROBE_WEEK_TTL = 3 * 3600
+
+# Parser in einem Prozess-Pool statt im Thread-Executor (große Schulen, mehrere Einträge)
+CONF_PROCESS_POOL = "process_pool"
+DEFAULT_PROCESS_POOL = False
+
+# Nachbarwochen relativ zur gewählten Woche (für exact_cells_by_date_time)
+NEIGHBOUR_WEEK_DELTAS = (-2, -1, 1, 2)
+# Max. Anzahl gemergter Wochen im Wochen-Cache (gewählte Woche + Nachbarwochen)
+WEEK_CACHE_SIZE = 12
+# Eigener Cache für Wochen, die nur die Wochen-API angefragt hat: ein großer
+# Zeitraum verdrängt so nie die gewählte Woche oder die Nachbarwochen
+API_WEEK_CACHE_SIZE = 12
+
+# Indiware (SPlanKl_Basis / SPlanKl_SwXX) Cache: Lebensdauer in Sekunden
+INDIWARE_BASIS_TTL = 12 * 3600
+INDIWARE_WEEK_TTL = 6 * 3600
+INDIWARE_FAILURE_TTL = 15 * 60
+INDIWARE_WEEK_CACHE_SIZE = 12
 
 # -----------------------------
 # Helpers
@@ -50,129 +95,12 @@ def weekdays_for_monday(monday_dt: datetime) -> List[datetime]:
     return [monday_dt + timedelta(days=i) for i in range(5)]
 
 
-def target_variants(target: str) -> List[str]:
-    """Robuste Varianten: 09c/9c, Case-Varianten."""
-    t = (target or "").strip()
-    if not t:
-        return []
-
-    variants: set[str] = set()
-
-    def add(x: str) -> None:
-        x = (x or "").strip()
-        if x:
-            variants.add(x)
-            variants.add(x.lower())
-            variants.add(x.upper())
-
-    add(t)
-
-    # 09c -> 9c
-    if len(t) >= 2 and t[0] == "0" and t[1].isdigit():
-        add(t.lstrip("0"))
-
-    # 9c -> 09c
-    m = re.match(r"^(\d)([a-zA-Z].*)$", t)
-    if m and not t.startswith("0"):
-        add(f"0{m.group(1)}{m.group(2)}")
-
-    return list(variants)
-
-
-def _format_text(text: str) -> List[str]:
-    """Zeilen normalisieren + simple Markierungen (🔴 bei Ausfall, 🟠 bei Verlegung)."""
-    t = (text or "").strip()
-    if not t:
-        return []
-
-    lines: List[str] = []
-    for raw_line in t.splitlines():
-        parts = [p.strip() for p in raw_line.split(";") if p.strip()]
-        lines.extend(parts if parts else [raw_line.strip()])
-
-    out: List[str] = []
-    for line in lines:
-        l = line.strip()
-        if not l:
-            continue
-        low = l.lower()
-        if re.search(r"\b(fällt\s+aus|entfällt)\b", low):
-            l = f"🔴 {l}"
-        elif re.search(r"\b(verlegt|verschoben)\b", low):
-            l = f"🟠 {l}"
-        out.append(l)
-
-    # Duplikate vermeiden (Stundenplan24 liefert teils denselben Hinweis doppelt,
-
-    # z.B. einmal mit Lehrername und einmal mit Kürzel).
-
-    def _dedupe_key(s: str) -> str:
-
-        x = (s or "").strip()
-
-        x = re.sub(r"^[🟠🔴]\s*", "", x)
-
-        # Entferne Lehrer-Kürzel / Fachkürzel (GEO, EN, G/R/W, etc.)
-
-        x = re.sub(r"\b[A-ZÄÖÜ]{1,4}(?:/[A-ZÄÖÜ]{1,4}){1,3}\b", " ", x)
-
-        x = re.sub(r"\b[A-ZÄÖÜ]{2,6}\b", " ", x)
-
-        # Entferne 'Frau/Herr Name'
-
-        x = re.sub(r"\b(Frau|Herr)\s+[A-Za-zÄÖÜäöüß\-]+\b", " ", x, flags=re.IGNORECASE)
-
-        x = x.lower()
-
-        x = re.sub(r"\s+", " ", x).strip()
-
-        return x
-
-    
-
-    seen: set[str] = set()
-
-    deduped: List[str] = []
-
-    for l in out:
-
-        k = _dedupe_key(l)
-
-        if k and k in seen:
-
-            continue
-
-        if k:
-
-            seen.add(k)
-
-        deduped.append(l)
-
-    
-
-    return deduped
-def _append_parallel(base: str, extra: str) -> str:
-    """Wenn in derselben Stunde mehrere Gruppen parallel existieren, Inhalte untereinander anhängen."""
-    b = (base or "").strip()
-    e = (extra or "").strip()
-    if not e:
-        return b
-    if not b:
-        return e
-    if e in b:
-        return b
-    return f"{b}\n\n{e}"
-
-
-def _norm_ts(s: str) -> str:
-    """Normalize timestamps like '17.02.2026 13:49' or '17.02.2026, 13:49' -> '17.02.2026, 13:49'."""
-    if not s:
+def data_fingerprint(data: Optional[Dict[str, Any]]) -> str:
+    """Structural hash of a payload (rows, exact maps, timestamps)."""
+    if not data:
         return ""
-    s = " ".join(str(s).strip().split())
-    m = re.search(r"(\d{1,2}\.\d{1,2}\.\d{4})\s*,?\s*(\d{1,2}:\d{2})", s)
-    if not m:
-        return s
-    return f"{m.group(1)}, {m.group(2)}"
+    blob = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=16).hexdigest()
 
 
 def _extract_stand_from_xml(xml_text: str) -> str:
@@ -192,67 +120,9 @@ def _extract_stand_from_xml(xml_text: str) -> str:
     return ""
 
 
-class OverlayType:
-    NONE = 0
-    CANCEL = 1
-    MOVE = 2
-    SUBSTITUTE = 3
-    SPECIAL = 4
-
-
-def _classify_overlay(txt: str) -> int:
-    """Erkennt Art der Änderung im VPlan/WPlan."""
-    t = (txt or "").strip().lower()
-    if not t:
-        return OverlayType.NONE
-
-    if "fällt aus" in t or "entfällt" in t:
-        return OverlayType.CANCEL
-    if "verlegt" in t or "verschoben" in t:
-        return OverlayType.MOVE
-    if any(
-        x in t
-        for x in [
-            "zeugnis",
-            "präventionstag",
-            "wandertag",
-            "projekttag",
-            "methodentag",
-            "studientag",
-            "unterrichtsfrei",
-            "prüfung",
-            "klausur",
-        ]
-    ):
-        return OverlayType.SPECIAL
-    if " für " in t or t.startswith("für "):
-        return OverlayType.SUBSTITUTE
-    if " statt " in t or t.startswith("statt "):
-        return OverlayType.SUBSTITUTE
-
-    return OverlayType.SUBSTITUTE
-
-
-
 # -----------------------------
 # Indiware Wochenplan Online (wplan/wdatenk) Helpers
 # -----------------------------
-def _parse_ddmmyyyy(s: str) -> Optional[datetime]:
-    try:
-        return datetime.strptime((s or "").strip(), "%d.%m.%Y")
-    except Exception:
-        return None
-
-
-def _indiware_date_in_range(d: datetime, start_s: str, end_s: str) -> bool:
-    ds = d.date()
-    a = _parse_ddmmyyyy(start_s)
-    b = _parse_ddmmyyyy(end_s)
-    if not a or not b:
-        return False
-    return a.date() <= ds <= b.date()
-
-
 def _ymd_to_dt(s: str) -> Optional[datetime]:
     try:
         return datetime.strptime((s or "").strip(), "%Y%m%d")
@@ -260,17 +130,6 @@ def _ymd_to_dt(s: str) -> Optional[datetime]:
         return None
 
 
-def _hour_from_time_label(label: str) -> Optional[int]:
-    m = re.search(r"\b(\d{1,2})\b", (label or "").strip())
-    if not m:
-        return None
-    try:
-        hour = int(m.group(1))
-    except Exception:
-        return None
-    return hour if hour > 0 else None
-
-
 def _url_indiware_basis(school_id: str) -> str:
     return f"https://www.stundenplan24.de/{school_id}/wplan/wdatenk/SPlanKl_Basis.xml"
 
@@ -278,42 +137,18 @@ def _url_indiware_basis(school_id: str) -> str:
 def _url_indiware_sw(school_id: str, sw: int) -> str:
     return f"https://www.stundenplan24.de/{school_id}/wplan/wdatenk/SPlanKl_Sw{sw}.xml"
 
-def _merge_cells(base: str, overlay: str) -> str:
-    """Intelligentes Mergen von Basis-Stundenplan und Vertretung."""
-    b = (base or "").strip()
-    o = (overlay or "").strip()
-    if not o:
-        return b
-
-    t = _classify_overlay(o)
-
-    if t == OverlayType.CANCEL:
-        return f"—\n{o}".strip()
 
-    if t == OverlayType.MOVE:
-        if o.startswith("---") or o.startswith("—"):
-            return o
-        if b:
-            b_lines = [x.strip() for x in b.splitlines() if x.strip()]
-            o_lines = [x.strip() for x in o.splitlines() if x.strip()]
-            for ln in o_lines:
-                if ln not in b_lines:
-                    b_lines.append(ln)
-            return "\n".join(b_lines).strip()
-        return o
-
-    if t == OverlayType.SPECIAL:
-        return o
-
-    # SUBSTITUTE: ersetzt den Inhalt (Vertretungslehrer/Fach/Raum)
-    return o
+def _extract_zeitstempel(xml_text: str) -> str:
+    """Cheap Kopf/zeitstempel lookup without building a tree."""
+    m = _RE_ZEITSTEMPEL.search(xml_text or "")
+    return m.group(1).strip() if m else ""
 
 
 # -----------------------------
 # Coordinator
 # -----------------------------
 class SPlanCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, hub: Optional[SchoolHub] = None) -> None:
         self.hass = hass
         self.entry = entry
 
@@ -321,6 +156,8 @@ class SPlanCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
         self.username: str = (entry.data.get("username") or "").strip()
         self.password: str = (entry.data.get("password") or "").strip()
         self.target: str = (entry.data.get(CONF_TARGET) or "").strip()
+        # Normalisierter Schlüssel für alle Klassen-Vergleiche (09c/9c/9C)
+        self._class_key: str = class_key(self.target)
 
         self.show_room: bool = bool(entry.options.get(CONF_SHOW_ROOM, entry.data.get(CONF_SHOW_ROOM, True)))
         self.show_teacher: bool = bool(entry.options.get(CONF_SHOW_TEACHER, entry.data.get(CONF_SHOW_TEACHER, False)))
@@ -330,21 +167,59 @@ class SPlanCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
         self.show_sub_text: bool = bool(entry.options.get(CONF_SHOW_SUB_TEXT, entry.data.get(CONF_SHOW_SUB_TEXT, True)))
 
         update_minutes = int(entry.options.get(CONF_UPDATE_MINUTES, DEFAULT_UPDATE_MINUTES))
-
-        self.api = Stundenplan24Api(hass, self.username, self.password)
+        self.update_minutes: int = update_minutes
+        # Intervall nach Tageszeit / Schulwochen statt fest alle update_minutes
+        self.adaptive_polling: bool = bool(entry.options.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING))
+        # Sensor: nur rows + meta statt Aliasen, rows_table und JSON-Strings
+        self.lean_attributes: bool = bool(entry.options.get(CONF_LEAN_ATTRIBUTES, DEFAULT_LEAN_ATTRIBUTES))
+        probe_weeks = max(0, min(MAX_PROBE_WEEKS, int(entry.options.get(CONF_PROBE_WEEKS, DEFAULT_PROBE_WEEKS))))
+        self.probe_deltas: Tuple[int, ...] = tuple(d for d in range(-probe_weeks, probe_weeks + 1) if d)
+
+        # Schulweiter Fetch-Hub (teilt Downloads mit allen Klassen derselben Schule)
+        self.hub: SchoolHub = hub or SchoolHub(hass, self.school_id, self.username, self.password)
+        self.api = self.hub.api
+        self.hub.attach(entry.entry_id, self._class_key)
+        self.hub.use_process_pool(entry.entry_id, bool(entry.options.get(CONF_PROCESS_POOL, DEFAULT_PROCESS_POOL)))
 
         # von number.py steuerbar (0=aktuelle Woche, 1=nächste, -1=letzte)
         self.week_offset: int = 0
 
+        # Letzter guter Payload auf der Platte (schneller Start / offline)
+        self._snapshot = SnapshotStore(hass, entry.entry_id)
+        # Zeitpunkt der letzten Änderung des Plans (saved_at des Snapshots); bewusst
+        # nicht in meta, damit eine unveränderte Revalidierung ein No-op bleibt
+        self.snapshot_saved_at: str = ""
+
+        # Gemergte Wochen (gewählte Woche + Nachbarwochen): (week_start, live) -> MergedWeek
+        self._week_cache: Dict[Tuple[str, bool], MergedWeek] = {}
+        # nur von der Wochen-API angefragte Wochen (gleiche Schlüssel)
+        self._api_week_cache: Dict[Tuple[str, bool], MergedWeek] = {}
+
         # Indiware (wplan/wdatenk) Cache pro Schulwoche
-        self._indiware_basis_cache: Optional[dict] = None
-        self._indiware_week_cache: Dict[int, Dict[str, Any]] = {}
+        # (TTL + LRU; Fehlschläge mit kurzer TTL, Invalidierung über Kopf/zeitstempel)
+        self._indiware_basis_cache: TtlLruCache[str, dict] = TtlLruCache(maxsize=1, ttl=INDIWARE_BASIS_TTL)
+        self._indiware_week_cache: TtlLruCache[int, Dict[str, Any]] = TtlLruCache(
+            maxsize=INDIWARE_WEEK_CACHE_SIZE, ttl=INDIWARE_WEEK_TTL
+        )
+        # Single-flight: key -> laufender Lade-Future (Basis / Schulwoche)
+        self._inflight: Dict[Any, asyncio.Future] = {}
+
+        # Change detection: unveränderte Pläne werden nicht erneut veröffentlicht
+        self._data_fingerprint: str = ""
+        # steigt mit jedem veröffentlichten Datenstand (Sensor-Attribut, ETag der Wochen-API)
+        self.data_version: int = 0
+        # Zähler (wie alle Cache-Statistiken) nur über diagnostics(), nicht im Payload:
+        # bei No-op-Refreshs wird der gar nicht neu veröffentlicht, die Werte wären veraltet
+        self.refreshes: int = 0
+        self.noop_refreshes: int = 0
 
         super().__init__(
             hass,
             logger=_LOGGER,
             name=f"stundenplan24_week_{self.target}",
             update_interval=timedelta(minutes=update_minutes),
+            # gleiches Objekt zurückgeben -> keine Listener, kein State-Write
+            always_update=False,
         )
 
     # -------- Fetchers --------
@@ -352,7 +227,7 @@ class SPlanCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
         """Basis: mobil PlanKlYYYYMMDD.xml. Returns (lessons, stand_ts)."""
         try:
             url = self.api.url_mobil_plan_kl_day(self.school_id, day_dt)
-            xml_text = await self.api.fetch_text(
+            xml_text = await self.hub.fetch_text(
                 url,
                 referer=f"https://www.stundenplan24.de/{self.school_id}/mobil/",
                 xhr=False,
@@ -365,19 +240,9 @@ class SPlanCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
             return [], ""
 
         stand = _extract_stand_from_xml(xml_text)
-
-        last: List[Tuple[int, str, str, str, str, str]] = []
-        for tv in target_variants(self.target):
-            lessons = parse_plan_klassen_xml(
-                xml_text,
-                target_class=tv,
-                show_room=self.show_room,
-                show_teacher=self.show_teacher,
-            )
-            last = lessons or []
-            if last:
-                return last, stand
-        return last, stand
+        index = await self.hub.async_parse(index_plan_klassen_xml, xml_text, self.hub.wanted_classes)
+        lessons = index.get(self._class_key, [])
+        return lessons, stand
 
     async def _fetch_vplan_overlay_lessons(self, day_dt: datetime) -> Tuple[List[Tuple[int, str, str, str, str, str]], str, bool]:
         """Overlay: vplan/vdaten VplanKlYYYYMMDD.xml.
@@ -387,7 +252,8 @@ class SPlanCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
         if the selected class itself has no changed lessons on that day.
         """
         try:
-            xml_text = await self.api.fetch_vplan_kl_day_xml(self.school_id, day_dt)
+            # Priorität erbt der Aufrufer (gewählte Woche / Nachbar- und API-Wochen)
+            xml_text = await self.hub.fetch_vplan_kl_day_xml(day_dt)
         except Exception as err:
             _LOGGER.debug("vplan fetch failed %s: %s", ymd(day_dt), err)
             return [], "", False
@@ -397,40 +263,27 @@ class SPlanCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
 
         stand = _extract_stand_from_xml(xml_text)
         vplan_day_available = "<" in xml_text and "xml" in xml_text.lower()
-
-        last: List[Tuple[int, str, str, str, str, str]] = []
-        for tv in target_variants(self.target):
-            lessons = parse_plan_klassen_xml(
-                xml_text,
-                target_class=tv,
-                show_room=self.show_room,
-                show_teacher=self.show_teacher,
-            )
-            last = lessons or []
-            if last:
-                return last, stand, vplan_day_available
-        return last, stand, vplan_day_available
+        index = await self.hub.async_parse(index_plan_klassen_xml, xml_text, self.hub.wanted_classes)
+        lessons = index.get(self._class_key, [])
+        return lessons, stand, vplan_day_available
 
     async def _fetch_wplan_info(self, day_dt: datetime) -> Dict[Tuple[int, int], str]:
         """Optional: mobil WPlanKlYYYYMMDD.xml als Zusatzinfos."""
         try:
-            xml_text = await self.api.fetch_wplan_day_xml(self.school_id, day_dt)
+            xml_text = await self.hub.fetch_wplan_day_xml(day_dt)
         except Exception:
             return {}
 
         if not xml_text:
             return {}
 
-        for tv in target_variants(self.target):
-            info_map = parse_wplan_xml(xml_text, target_class=tv)
-            if info_map:
-                return info_map
-        return {}
+        index = await self.hub.async_parse(index_wplan_xml, xml_text)
+        return index.get(self._class_key, {})
 
     async def _fetch_wplan_day_overlay_lessons(self, day_dt: datetime) -> Tuple[List[Tuple[int, str, str, str, str, str]], str, bool]:
         """Future-week overlay from Wochenplan Online day XML."""
         try:
-            xml_text = await self.api.fetch_wplan_day_xml(self.school_id, day_dt)
+            xml_text = await self.hub.fetch_wplan_day_xml(day_dt)
         except Exception as err:
             _LOGGER.debug("wplan day fetch failed %s: %s", ymd(day_dt), err)
             return [], "", False
@@ -440,75 +293,76 @@ class SPlanCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
 
         stand = _extract_stand_from_xml(xml_text)
         available = "<" in xml_text and "xml" in xml_text.lower()
-
-        last: List[Tuple[int, str, str, str, str, str]] = []
-        for tv in target_variants(self.target):
-            lessons = parse_wplan_day_xml_lessons(
-                xml_text,
-                target_class=tv,
-                show_room=self.show_room,
-                show_teacher=self.show_teacher,
-            )
-            last = lessons or []
-            if last:
-                return last, stand, available
-
-        return last, stand, available
+        index = await self.hub.async_parse(index_wplan_day_xml_lessons, xml_text, self.hub.wanted_classes)
+        lessons = index.get(self._class_key, [])
+        return lessons, stand, available
 
     
     # -------- Indiware Wochenplan Online (wplan/wdatenk) --------
+    async def _single_flight(self, key: Any, factory: Callable[[], Awaitable[_T]]) -> _T:
+        """Run factory() once per key; concurrent callers await the same in-flight future."""
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(factory())
+            self._inflight[key] = fut
+
+            def _done(f: asyncio.Future, k: Any = key) -> None:
+                if self._inflight.get(k) is f:
+                    self._inflight.pop(k, None)
+
+            fut.add_done_callback(_done)
+        return await asyncio.shield(fut)
+
     async def _fetch_indiware_basis(self) -> Optional[dict]:
-        """Fetch + parse SPlanKl_Basis.xml. Returns dict with keys: ba_sw_von, ba_sw_bis, weeks(list)."""
-        if self._indiware_basis_cache is not None:
-            return self._indiware_basis_cache
+        """Fetch + parse SPlanKl_Basis.xml. Returns dict with keys: ba_sw_von, ba_sw_bis, weeks(list), stand."""
+        basis = self._indiware_basis_cache.get("basis")
+        if basis is not None:
+            # {} = gemerkter Fehlschlag (kurze TTL)
+            return basis or None
+        return await self._single_flight("indiware_basis", self._load_indiware_basis)
+
+    async def _load_indiware_basis(self) -> Optional[dict]:
+        previous = self._indiware_basis_cache.get_stale("basis")
         try:
             url = _url_indiware_basis(self.school_id)
-            xml_text = await self.api.fetch_text(
+            xml_text = await self.hub.fetch_text(
                 url,
                 referer=f"https://www.stundenplan24.de/{self.school_id}/wplan/plan.html",
                 xhr=True,
             )
         except Exception as err:
             _LOGGER.debug("Indiware basis fetch failed: %s", err)
-            self._indiware_basis_cache = None
+            self._indiware_basis_cache.set("basis", {}, ttl=INDIWARE_FAILURE_TTL)
             return None
 
         if not xml_text or "<splan" not in xml_text:
-            self._indiware_basis_cache = None
+            self._indiware_basis_cache.set("basis", {}, ttl=INDIWARE_FAILURE_TTL)
             return None
 
         try:
-            root = ET.fromstring(xml_text)
-            basis = root.find("Basisdaten")
-            ba_sw_von = int(basis.findtext("BaSwVon", "0")) if basis is not None else 0
-            ba_sw_bis = int(basis.findtext("BaSwBis", "0")) if basis is not None else 0
-
-            weeks = []
-            sws = root.find("Schulwochen")
-            if sws is not None:
-                for sw_el in sws.findall("Sw"):
-                    sw_num = int((sw_el.text or "0").strip() or 0)
-                    sw_von = sw_el.attrib.get("SwDatumVon", "")
-                    sw_bis = sw_el.attrib.get("SwDatumBis", "")
-                    weeks.append((sw_num, sw_von, sw_bis))
-            out = {"ba_sw_von": ba_sw_von, "ba_sw_bis": ba_sw_bis, "weeks": weeks}
-            self._indiware_basis_cache = out
-            return out
+            out = await self.hub.async_parse(parse_splankl_basis, xml_text)
         except Exception as err:
             _LOGGER.debug("Indiware basis parse failed: %s", err)
-            self._indiware_basis_cache = None
+            self._indiware_basis_cache.set("basis", {}, ttl=INDIWARE_FAILURE_TTL)
             return None
 
+        # Neuer Basis-Zeitstempel -> Schulwochen-Kalender kann sich geändert haben
+        if previous and previous is not out:
+            if not out.get("stand") or previous.get("stand") != out.get("stand"):
+                self._indiware_week_cache.clear()
+        self._indiware_basis_cache.set("basis", out)
+        return out
+
     def _indiware_sw_for_date(self, basis: dict, day_dt: datetime) -> Optional[int]:
-        for (sw_num, sw_von, sw_bis) in basis.get("weeks", []):
-            if _indiware_date_in_range(day_dt, sw_von, sw_bis):
-                return int(sw_num)
-        return None
+        index = basis.get("index")
+        if not isinstance(index, SchoolWeekIndex):
+            index = SchoolWeekIndex(basis.get("weeks", []))
+        return index.sw_for_date(day_dt.date())
 
     async def _fetch_indiware_sw_xml(self, sw: int) -> Optional[str]:
         url = _url_indiware_sw(self.school_id, sw)
         try:
-            return await self.api.fetch_text(
+            return await self.hub.fetch_text(
                 url,
                 referer=f"https://www.stundenplan24.de/{self.school_id}/wplan/plan.html",
                 xhr=True,
@@ -517,76 +371,11 @@ class SPlanCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
             # bubble up 404 etc for debug, caller handles
             raise err
 
-    def _parse_splankl_sw_for_target(
+    async def _parse_splankl_sw_for_target(
         self, xml_text: str
     ) -> Tuple[Dict[int, List[Tuple[int, str, str, str, str, str]]], str]:
-        """Parse SPlanKl_SwXX.xml for target class. Returns (day_num->lessons, stand_ts)."""
-        day_map: Dict[int, List[Tuple[int, str, str, str, str, str]]] = {1: [], 2: [], 3: [], 4: [], 5: []}
-        stand = ""
-        root = ET.fromstring(xml_text)
-        stand = (root.findtext("Kopf/zeitstempel", "") or "").strip()
-
-        # locate class node by Kurz
-        target_set = set(target_variants(self.target))
-        kl_node = None
-        klassen = root.find("Klassen")
-        if klassen is not None:
-            for kl in klassen.findall("Kl"):
-                kurz = (kl.findtext("Kurz", "") or "").strip()
-                if kurz in target_set:
-                    kl_node = kl
-                    break
-        if kl_node is None:
-            return day_map, stand
-
-        # times per hour
-        times: Dict[int, Tuple[str, str]] = {}
-        stunden = kl_node.find("Stunden")
-        if stunden is not None:
-            for st in stunden.findall("St"):
-                try:
-                    h = int((st.text or "0").strip() or 0)
-                except Exception:
-                    continue
-                z1 = (st.attrib.get("StZeit", "") or "").strip()
-                z2 = (st.attrib.get("StZeitBis", "") or "").strip()
-                if h > 0:
-                    times[h] = (z1, z2)
-
-        pl = kl_node.find("Pl")
-        if pl is None:
-            return day_map, stand
-
-        for std in pl.findall("Std"):
-            try:
-                day_num = int((std.findtext("PlTg", "0") or "0").strip() or 0)
-                hour = int((std.findtext("PlSt", "0") or "0").strip() or 0)
-            except Exception:
-                continue
-            if day_num < 1 or day_num > 5 or hour <= 0:
-                continue
-
-            fach = (std.findtext("PlFa", "") or "").strip()
-            lehrer = (std.findtext("PlLe", "") or "").strip()
-            raum = (std.findtext("PlRa", "") or "").strip()
-            info = (
-                (std.findtext("PlIf", "") or "").strip()
-                or (std.findtext("If", "") or "").strip()
-                or (std.findtext("Info", "") or "").strip()
-                or (std.findtext("Text", "") or "").strip()
-            )
-
-            if not fach and info:
-                fach = info
-                info = ""
-
-            if info and info not in fach:
-                fach = f"{fach}\n{info}".strip()
-
-            start, end = times.get(hour, ("", ""))
-            day_map[day_num].append((hour, fach, lehrer, raum, start, end))
-
-        return day_map, stand
+        """Parse SPlanKl_SwXX.xml for the target class (content-addressed cache)."""
+        return await self.hub.async_parse(parse_splankl_sw_for_target, xml_text, self.target)
 
     async def _ensure_indiware_week(self, monday_dt: datetime) -> Optional[Dict[str, Any]]:
         """Ensure Indiware week cache for school week corresponding to monday_dt (calendar monday)."""
@@ -598,32 +387,66 @@ class SPlanCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
         if not target_sw:
             return None
 
-        if target_sw in self._indiware_week_cache:
-            return self._indiware_week_cache[target_sw]
+        cached = self._indiware_week_cache.get(target_sw)
+        if cached is not None:
+            return cached
 
+        # Die 5 Tage einer Woche fragen parallel an -> nur ein Lade-/Rückwärtslauf pro Schulwoche
+        return await self._single_flight(
+            ("indiware_week", target_sw),
+            lambda: self._revalidate_indiware_week(basis, target_sw),
+        )
+
+    async def _revalidate_indiware_week(self, basis: dict, target_sw: int) -> Dict[str, Any]:
+        """Refresh an expired week entry; unchanged Kopf/zeitstempel keeps the parsed week."""
+        stale = self._indiware_week_cache.get_stale(target_sw)
+        if stale and stale.get("ok") and not stale.get("copied") and stale.get("stand"):
+            try:
+                xml_text = await self._fetch_indiware_sw_xml(target_sw)
+            except Exception as err:
+                _LOGGER.debug("Indiware week %s revalidation failed: %s", target_sw, err)
+                xml_text = None
+            if xml_text and _extract_zeitstempel(xml_text) == stale.get("stand"):
+                self._indiware_week_cache.touch(target_sw)
+                return stale
+        return await self._load_indiware_week(basis, target_sw)
+
+    async def _load_indiware_week(self, basis: dict, target_sw: int) -> Dict[str, Any]:
         # fetch sw file; if missing, copy from nearest earlier available week within basis range
         ba_von = int(basis.get("ba_sw_von", 0) or 0)
-        sw_to_try = target_sw
+        files = self.hub.school_weeks
+        files.sync_basis(basis.get("stand", ""))
         xml_text = None
         used_sw = None
         last_err = ""
-        for sw in range(sw_to_try, max(ba_von, 1) - 1, -1):
+        floor = max(ba_von, 1)
+        sw = target_sw
+        while sw >= floor:
             try:
+                # bekannt fehlende Dateien beantwortet der 404-Cache der Api ohne Request
                 xml_text = await self._fetch_indiware_sw_xml(sw)
                 if xml_text and "<splan" in xml_text:
+                    files.mark(sw, True)
                     used_sw = sw
                     break
+            except NotFoundError as err:
+                files.mark(sw, False)
+                last_err = str(err)
             except Exception as err:
                 last_err = str(err)
-                # try earlier
-                continue
+            # nächste bekannt vorhandene frühere Woche direkt, sonst eine Woche zurück
+            known = files.nearest_present(sw, floor)
+            sw = known if known is not None else sw - 1
 
         if not xml_text or used_sw is None:
-            self._indiware_week_cache[target_sw] = {"ok": False, "err": last_err, "target_sw": target_sw}
-            return self._indiware_week_cache[target_sw]
+            return self._indiware_week_cache.set(
+                target_sw,
+                {"ok": False, "err": last_err, "target_sw": target_sw},
+                ttl=INDIWARE_FAILURE_TTL,
+            )
 
         try:
-            day_map, stand = self._parse_splankl_sw_for_target(xml_text)
+            day_map, stand = await self._parse_splankl_sw_for_target(xml_text)
             out = {
                 "ok": True,
                 "target_sw": target_sw,
@@ -632,11 +455,13 @@ class SPlanCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
                 "stand": stand,
                 "day_map": day_map,
             }
-            self._indiware_week_cache[target_sw] = out
-            return out
+            return self._indiware_week_cache.set(target_sw, out)
         except Exception as err:
-            self._indiware_week_cache[target_sw] = {"ok": False, "err": str(err), "target_sw": target_sw}
-            return self._indiware_week_cache[target_sw]
+            return self._indiware_week_cache.set(
+                target_sw,
+                {"ok": False, "err": str(err), "target_sw": target_sw},
+                ttl=INDIWARE_FAILURE_TTL,
+            )
 
     async def _fetch_day_bundle(self, week_monday: datetime, day_dt: datetime, use_current_week_mode: bool) -> Tuple[List[Tuple[int, str, str, str, str, str]], List[Tuple[int, str, str, str, str, str]], str, bool]:
         """Fetch base+overlay for a specific day.
@@ -645,25 +470,10 @@ class SPlanCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
         selected week. For probed adjacent weeks we always prefer Indiware week
         base data when available.
         """
-        if not use_current_week_mode:
-            indi = await self._ensure_indiware_week(week_monday)
-            if indi and indi.get("ok") and isinstance(indi.get("day_map"), dict):
-                day_num = day_dt.weekday() + 1
-                base_lessons = list(indi["day_map"].get(day_num, []))
-                base_stand = indi.get("stand", "") or ""
-                overlay_lessons, overlay_stand, overlay_available = await self._fetch_wplan_day_overlay_lessons(day_dt)
-                stand = overlay_stand or (base_stand if overlay_available else "")
-                return base_lessons, overlay_lessons, stand, overlay_available
-
-        if int(self.week_offset) != 0 and use_current_week_mode:
-            indi = await self._ensure_indiware_week(week_monday)
-            if indi and indi.get("ok") and isinstance(indi.get("day_map"), dict):
-                day_num = day_dt.weekday() + 1
-                base_lessons = list(indi["day_map"].get(day_num, []))
-                base_stand = indi.get("stand", "") or ""
-                overlay_lessons, overlay_stand, overlay_available = await self._fetch_wplan_day_overlay_lessons(day_dt)
-                stand = overlay_stand or (base_stand if overlay_available else "")
-                return base_lessons, overlay_lessons, stand, overlay_available
+        if not use_current_week_mode or int(self.week_offset) != 0:
+            bundle = await self._fetch_indiware_day_bundle(week_monday, day_dt)
+            if bundle is not None:
+                return bundle
 
         base_task = asyncio.create_task(self._fetch_mobil_plan_lessons(day_dt))
         ov_task = asyncio.create_task(self._fetch_vplan_overlay_lessons(day_dt))
@@ -671,628 +481,333 @@ class SPlanCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
         stand = overlay_stand or base_stand or ""
         return base_lessons, overlay_lessons, stand, overlay_available
 
-    async def _build_rows_from_day_results(
-        self,
-        day_dates: List[datetime],
-        day_results: List[Tuple[List[Tuple[int, str, str, str, str, str]], List[Tuple[int, str, str, str, str, str]], str, bool]],
-    ) -> Tuple[List[Dict[str, Any]], bool, bool]:
-        """Build final week rows using the same merge logic as the main response."""
-        by_hour: Dict[int, Dict[str, Any]] = {}
-        time_minmax: Dict[int, Tuple[Optional[int], Optional[int]]] = {}
-        base_any = False
-        overlay_any = False
-
-        def to_min(t: str) -> Optional[int]:
-            t = (t or "").strip()
-            if not t or ":" not in t:
-                return None
-            try:
-                hh, mm = t.split(":", 1)
-                return int(hh) * 60 + int(mm)
-            except Exception:
-                return None
-
-        def to_hhmm(m: int) -> str:
-            return f"{m//60:02d}:{m%60:02d}"
-
-        for col_idx, (base_lessons, overlay_lessons, _stand, _overlay_available) in enumerate(day_results):
-            if base_lessons:
-                base_any = True
-            if overlay_lessons:
-                overlay_any = True
-
-            for (stunde, fach, lehrer, raum, start, end) in base_lessons:
-                if not stunde or stunde <= 0:
-                    continue
-                row = by_hour.get(stunde)
-                if not row:
-                    row = {"time": f"{stunde}.", "start": "", "end": "", "cells": ["", "", "", "", ""]}
-                    by_hour[stunde] = row
-
-                smin = to_min(start)
-                emin = to_min(end)
-                cur_s, cur_e = time_minmax.get(stunde, (None, None))
-                if smin is not None:
-                    cur_s = smin if cur_s is None else min(cur_s, smin)
-                if emin is not None:
-                    cur_e = emin if cur_e is None else max(cur_e, emin)
-                time_minmax[stunde] = (cur_s, cur_e)
-
-                lines: List[str] = []
-                lines.extend(_format_text((fach or "").strip()))
-                if self.show_room and (raum or "").strip():
-                    lines.append((raum or "").strip())
-                if self.show_teacher and (lehrer or "").strip():
-                    lines.append((lehrer or "").strip())
-
-                cell = "\n".join([l for l in lines if l]).strip()
-                if cell:
-                    row["cells"][col_idx] = _append_parallel(row["cells"][col_idx] or "", cell)
-
-            for (stunde, fach, lehrer, raum, start, end) in overlay_lessons:
-                if not stunde or stunde <= 0:
-                    continue
-                row = by_hour.get(stunde)
-                if not row:
-                    row = {"time": f"{stunde}.", "start": "", "end": "", "cells": ["", "", "", "", ""]}
-                    by_hour[stunde] = row
-
-                smin = to_min(start)
-                emin = to_min(end)
-                cur_s, cur_e = time_minmax.get(stunde, (None, None))
-                if cur_s is None and smin is not None:
-                    cur_s = smin
-                if cur_e is None and emin is not None:
-                    cur_e = emin
-                time_minmax[stunde] = (cur_s, cur_e)
-
-                lines: List[str] = []
-                lines.extend(_format_text((fach or "").strip()))
-                if self.show_room and (raum or "").strip():
-                    lines.append((raum or "").strip())
-                if self.show_teacher and (lehrer or "").strip():
-                    lines.append((lehrer or "").strip())
-
-                overlay_cell = "\n".join([l for l in lines if l]).strip()
-                if not overlay_cell:
-                    continue
-
-                base_cell = (row["cells"][col_idx] or "").strip()
-                row["cells"][col_idx] = _merge_cells(base_cell, overlay_cell)
-
-        if self.wplan_enabled and self.show_sub_text:
-            for day_dt in day_dates:
-                info_map = await self._fetch_wplan_info(day_dt)
-                if not info_map:
-                    continue
-                for (day_num, hour), info in info_map.items():
-                    if day_num < 1 or day_num > 5 or not hour or hour <= 0:
-                        continue
-
-                    col_idx = day_num - 1
-                    info_lines = _format_text(info)
-                    if not info_lines:
-                        continue
-
-                    row = by_hour.get(hour)
-                    if not row:
-                        row = {"time": f"{hour}.", "start": "", "end": "", "cells": ["", "", "", "", ""]}
-                        by_hour[hour] = row
-
-                    base_cell = (row["cells"][col_idx] or "").strip()
-                    row["cells"][col_idx] = _merge_cells(base_cell, "\n".join(info_lines))
-
-        for h, row in by_hour.items():
-            s, e = time_minmax.get(h, (None, None))
-            if s is not None:
-                row["start"] = to_hhmm(s)
-            if e is not None:
-                row["end"] = to_hhmm(e)
-
-        hours = sorted(by_hour.keys())
-        rows = [by_hour[h] for h in hours]
-        for row in rows:
-            row["cells"] = [c.strip() if c and c.strip() else "" for c in row["cells"]]
-
-        return rows, base_any, overlay_any
-
-    def _build_exact_maps_from_rows(
-        self,
-        day_dates: List[datetime],
-        rows: List[Dict[str, Any]],
-    ) -> Dict[str, Dict[str, str]]:
-        out: Dict[str, Dict[str, str]] = {ymd(day_dt): {} for day_dt in day_dates}
-        for row in rows:
-            time_key = (row.get("time") or "").strip()
-            if not time_key:
-                continue
-            cells = row.get("cells") or []
-            for idx, day_dt in enumerate(day_dates):
-                if idx < len(cells):
-                    out[ymd(day_dt)][time_key] = (cells[idx] or "").strip()
-        return out
+    async def _fetch_indiware_day_bundle(
+        self, week_monday: datetime, day_dt: datetime
+    ) -> Optional[Tuple[List[Tuple[int, str, str, str, str, str]], List[Tuple[int, str, str, str, str, str]], str, bool]]:
+        """Indiware week base + WPlan day overlay of one day; None without Indiware data."""
+        # unabhängig voneinander -> beide Requests gleichzeitig
+        indi, (overlay_lessons, overlay_stand, overlay_available) = await asyncio.gather(
+            self._ensure_indiware_week(week_monday),
+            self._fetch_wplan_day_overlay_lessons(day_dt),
+        )
+        if not (indi and indi.get("ok") and isinstance(indi.get("day_map"), dict)):
+            return None
+        day_num = day_dt.weekday() + 1
+        base_lessons = list(indi["day_map"].get(day_num, []))
+        base_stand = indi.get("stand", "") or ""
+        stand = overlay_stand or (base_stand if overlay_available else "")
+        return base_lessons, overlay_lessons, stand, overlay_available
 
-    def _build_exact_week_maps(
-        self,
-        day_dates: List[datetime],
-        day_results: List[Tuple[List[Tuple[int, str, str, str, str, str]], List[Tuple[int, str, str, str, str, str]], str, bool]],
-    ) -> Tuple[Dict[str, Dict[str, str]], Dict[str, str], Dict[str, bool]]:
-        """Build date->time->cell maps for exact rolling rendering."""
-        cells_by_date_time: Dict[str, Dict[str, str]] = {}
-        updated_by_date: Dict[str, str] = {}
-        available_by_date: Dict[str, bool] = {}
-
-        for day_dt, (base_lessons, overlay_lessons, stand, overlay_available) in zip(day_dates, day_results):
-            date_key = ymd(day_dt)
-            updated_by_date[date_key] = _norm_ts(stand) if stand else ""
-            available_by_date[date_key] = bool(overlay_available)
-
-            by_hour: Dict[int, Dict[str, Any]] = {}
-            time_minmax: Dict[int, Tuple[Optional[int], Optional[int]]] = {}
-
-            def to_min(t: str) -> Optional[int]:
-                t = (t or "").strip()
-                if not t or ":" not in t:
-                    return None
-                try:
-                    hh, mm = t.split(":", 1)
-                    return int(hh) * 60 + int(mm)
-                except Exception:
-                    return None
-
-            def to_hhmm(m: int) -> str:
-                return f"{m//60:02d}:{m%60:02d}"
-
-            for lessons, is_overlay in ((base_lessons, False), (overlay_lessons, True)):
-                for (stunde, fach, lehrer, raum, start, end) in lessons:
-                    if not stunde or stunde <= 0:
-                        continue
-
-                    row = by_hour.get(stunde)
-                    if not row:
-                        row = {"time": f"{stunde}.", "start": "", "end": "", "cell": ""}
-                        by_hour[stunde] = row
-
-                    smin = to_min(start)
-                    emin = to_min(end)
-                    cur_s, cur_e = time_minmax.get(stunde, (None, None))
-                    if smin is not None:
-                        cur_s = smin if cur_s is None else min(cur_s, smin)
-                    if emin is not None:
-                        cur_e = emin if cur_e is None else max(cur_e, emin)
-                    time_minmax[stunde] = (cur_s, cur_e)
-
-                    fach = (fach or "").strip()
-                    lehrer = (lehrer or "").strip()
-                    raum = (raum or "").strip()
-
-                    lines: List[str] = []
-                    lines.extend(_format_text(fach))
-                    if self.show_room and raum:
-                        lines.append(raum)
-                    if self.show_teacher and lehrer:
-                        lines.append(lehrer)
-
-                    cell = "\n".join([l for l in lines if l]).strip()
-                    if not cell:
-                        continue
-
-                    if is_overlay:
-                        row["cell"] = _merge_cells((row["cell"] or "").strip(), cell)
-                    else:
-                        row["cell"] = _append_parallel((row["cell"] or "").strip(), cell)
-
-            day_map: Dict[str, str] = {}
-            for hour in sorted(by_hour.keys()):
-                row = by_hour[hour]
-                s, e = time_minmax.get(hour, (None, None))
-                if s is not None:
-                    row["start"] = to_hhmm(s)
-                if e is not None:
-                    row["end"] = to_hhmm(e)
-                day_map[row["time"]] = (row["cell"] or "").strip()
-            cells_by_date_time[date_key] = day_map
-
-        return cells_by_date_time, updated_by_date, available_by_date
-
-    async def _enrich_exact_maps_with_wplan(
-        self,
-        day_dates: List[datetime],
-        cells_by_date_time: Dict[str, Dict[str, str]],
-    ) -> Dict[str, Dict[str, str]]:
-        """Apply optional WPlan info to exact date maps as well.
-
-        The card uses `exact_cells_by_date_time` for date-accurate rendering in
-        rolling/adjacent-week views. If we only enrich the main weekly rows with
-        WPlan info, those exact maps would overwrite the richer cells with a
-        stripped-down base/overlay version.
-        """
+    async def _fetch_wplan_infos(self, day_dates: List[datetime]) -> List[Dict[Tuple[int, int], str]]:
+        """Optional WPlan info maps for the given days (empty when disabled)."""
         if not self.wplan_enabled or not self.show_sub_text:
-            return cells_by_date_time
-
-        for day_dt in day_dates:
-            info_map = await self._fetch_wplan_info(day_dt)
-            if not info_map:
-                continue
-
-            date_key = ymd(day_dt)
-            day_map = cells_by_date_time.setdefault(date_key, {})
-            day_num = day_dt.weekday() + 1
-
-            for (info_day_num, hour), info in info_map.items():
-                if info_day_num != day_num or not hour or hour <= 0:
-                    continue
+            return []
+        return list(await asyncio.gather(*(self._fetch_wplan_info(day_dt) for day_dt in day_dates)))
+
+    async def _merge_week(self, monday: datetime, use_current_week_mode: bool) -> MergedWeek:
+        """Fetch all days of one week and merge them with the shared merge engine."""
+        day_dates = weekdays_for_monday(monday)  # Mo..Fr
+        # Tagesdateien und WPlan-Infos sind unabhängig voneinander -> alles parallel
+        day_results, info_maps = await asyncio.gather(
+            asyncio.gather(
+                *(self._fetch_day_bundle(monday, d, use_current_week_mode=use_current_week_mode) for d in day_dates)
+            ),
+            self._fetch_wplan_infos(day_dates),
+        )
+        # CPU-lastiger Merge im Executor; zurück kommt nur die fertige Woche
+        return await self.hass.async_add_executor_job(
+            merge_week, day_dates, list(day_results), info_maps, self.show_room, self.show_teacher
+        )
 
-                info_lines = _format_text(info)
-                if not info_lines:
-                    continue
+    # -------- Snapshot --------
+    async def async_restore_snapshot(self) -> bool:
+        """Publish the last persisted payload right away. Returns False if there is none."""
+        snap = await self._snapshot.async_load()
+        if snap is None:
+            return False
+
+        data = snap["data"]
+        self.snapshot_saved_at = str(snap.get("saved_at") or "")
+        self.week_offset = int(snap.get("week_offset", 0) or 0)
+        self._mark_published(await self.hass.async_add_executor_job(data_fingerprint, data))
+        self.async_set_updated_data(data)
+        return True
+
+    # -------- Update --------
+    async def _async_update_data(self) -> Dict[str, Any]:
+        # Innerhalb eines Refreshs wird jede URL höchstens einmal angefragt
+        with self.api.refresh_scope():
+            data = await self._async_build_data()
+        if self.adaptive_polling:
+            await self._async_adapt_update_interval()
+        self.hub.async_schedule_save()
+
+        self.refreshes += 1
+        # json.dumps über die ganze Woche: nicht auf dem Event-Loop
+        fingerprint = await self.hass.async_add_executor_job(data_fingerprint, data)
+        if self.data is not None and fingerprint == self._data_fingerprint:
+            # Plan unverändert: bisheriges Objekt -> DataUpdateCoordinator benachrichtigt niemanden
+            self.noop_refreshes += 1
+            _LOGGER.debug(
+                "%s: plan unchanged, skipping update (%d of %d refreshes were no-ops)",
+                self.name,
+                self.noop_refreshes,
+                self.refreshes,
+            )
+            return self.data
+
+        self._mark_published(fingerprint)
+        self.snapshot_saved_at = self._snapshot.async_save(data, int(self.week_offset))
+        return data
+
+    def _mark_published(self, fingerprint: str) -> None:
+        self._data_fingerprint = fingerprint
+        self.data_version += 1
+
+    def diagnostics(self) -> Dict[str, Any]:
+        """Live refresh and cache counters (diagnostics.py); never part of the payload."""
+        return {
+            "refreshes": self.refreshes,
+            "noop_refreshes": self.noop_refreshes,
+            "data_version": self.data_version,
+            "snapshot_saved_at": self.snapshot_saved_at,
+            "update_interval_s": self.update_interval.total_seconds() if self.update_interval else None,
+            "week_cache_size": len(self._week_cache),
+            "api_week_cache_size": len(self._api_week_cache),
+            "parse_cache": self.hub.parse_cache.stats(),
+            "text_cache": text_cache_stats(),
+            "breakers": self.api.breaker_stats(),
+        }
+
+    async def _async_adapt_update_interval(self) -> None:
+        """Pick the next poll interval from school hours and the Schulwochen calendar."""
+        # Schulwochen-Kalender (Ferien): SPlanKl_Basis.xml, mit eigener TTL gecacht;
+        # ohne Nachbarwochen/Offset lädt ihn sonst niemand
+        basis = await self._fetch_indiware_basis() or self._indiware_basis_cache.get_stale("basis")
+        now = datetime.now()
+        week = self._cached_week(monday_of_week(now), True)
+        interval = next_poll_interval(
+            now,
+            self.update_minutes,
+            school_week_ranges(basis),
+            lesson_window(week.rows if week is not None else ()),
+        )
+        if interval != self.update_interval:
+            _LOGGER.debug("%s: next poll in %s", self.name, interval)
+        self.update_interval = interval
 
-                time_key = f"{hour}."
-                base_cell = (day_map.get(time_key) or "").strip()
-                day_map[time_key] = _merge_cells(base_cell, "\n".join(info_lines))
+    def selected_monday(self) -> datetime:
+        return monday_of_week(datetime.now()) + timedelta(weeks=int(self.week_offset))
 
-        return cells_by_date_time
+    def _store_week(self, week: MergedWeek, api: bool = False) -> None:
+        cache, size = (self._api_week_cache, API_WEEK_CACHE_SIZE) if api else (self._week_cache, WEEK_CACHE_SIZE)
+        cache[(ymd(week.monday), week.live)] = week
+        while len(cache) > size:
+            oldest = min(cache, key=lambda k: cache[k].computed_at)
+            cache.pop(oldest, None)
 
-    async def _fetch_wplan_html_week_map(self, monday_dt: datetime) -> Dict[str, Dict[str, str]]:
-        """Fetch Stundenplan24 weekly HTML and map it to exact day/hour cells."""
-        try:
-            html_text = await self.api.fetch_wplan_html(self.school_id, monday_dt)
-        except Exception:
-            return {}
+    def _cached_week(self, monday: datetime, live: bool, api: bool = False) -> Optional[MergedWeek]:
+        """Cached merged week; falls back to the other source mode of the same week.
 
-        rows = parse_wplan_html_to_rows(html_text)
-        if not rows:
-            return {}
+        With api=True the week API's own cache is consulted after the main one.
+        """
+        key = ymd(monday)
+        caches = (self._week_cache, self._api_week_cache) if api else (self._week_cache,)
+        for cache in caches:
+            week = cache.get((key, live)) or cache.get((key, not live))
+            if week is not None:
+                return week
+        return None
 
-        day_dates = weekdays_for_monday(monday_dt)
-        week_map: Dict[str, Dict[str, str]] = {ymd(day_dt): {} for day_dt in day_dates}
+    def cached_week(self, monday: datetime) -> Optional[MergedWeek]:
+        """Merged week for the week API (live source for the current calendar week)."""
+        return self._cached_week(monday, live=monday == monday_of_week(datetime.now()), api=True)
 
-        for row in rows:
-            hour = _hour_from_time_label(str(row.get("time", "")))
-            if not hour:
-                continue
-            cells = row.get("cells") or []
-            for day_idx, day_dt in enumerate(day_dates):
-                if day_idx >= len(cells):
-                    continue
-                cell = (cells[day_idx] or "").strip()
-                if not cell:
-                    continue
-                week_map[ymd(day_dt)][f"{hour}."] = cell
-
-        return week_map
-
-    async def _enrich_exact_maps_with_wplan_html(
-        self,
-        monday_dt: datetime,
-        cells_by_date_time: Dict[str, Dict[str, str]],
-    ) -> Dict[str, Dict[str, str]]:
-        """Use Stundenplan24 weekly HTML as authoritative enrichment for visible future days."""
-        if not self.wplan_enabled or not self.show_sub_text:
-            return cells_by_date_time
+    @staticmethod
+    def _week_fresh(week: MergedWeek) -> bool:
+        return time.monotonic() - week.computed_at < PROBE_WEEK_TTL
 
-        week_map = await self._fetch_wplan_html_week_map(monday_dt)
-        if not week_map:
-            return cells_by_date_time
+    async def _probe_week(self, monday: datetime, api: bool = False) -> MergedWeek:
+        """Merge a neighbour week (Indiware-Wochenplan + WPlan-Tagesdateien) into the week cache
+        (api=True: into the week API's cache)."""
 
-        for date_key, hour_map in week_map.items():
-            day_map = cells_by_date_time.setdefault(date_key, {})
-            for time_key, cell in hour_map.items():
-                if cell:
-                    day_map[time_key] = cell
+        async def _load() -> MergedWeek:
+            with request_priority(PRIORITY_BACKGROUND), self.api.refresh_scope():
+                week = await self._merge_week(monday, use_current_week_mode=False)
+            self._store_week(week, api=api)
+            return week
 
-        return cells_by_date_time
+        return await self._single_flight(("probe_week", ymd(monday), api), _load)
 
-# -------- Update --------
-    async def _async_update_data(self) -> Dict[str, Any]:
+    async def _revalidate_week(self, monday: datetime, api: bool = False) -> None:
+        """Background _probe_week: failures only cost freshness, the cached week stays."""
         try:
-            today = datetime.now()
-            monday = monday_of_week(today) + timedelta(weeks=int(self.week_offset))
-            day_dates = weekdays_for_monday(monday)  # Mo..Fr
-
-            by_hour: Dict[int, Dict[str, Any]] = {}
-            time_minmax: Dict[int, Tuple[Optional[int], Optional[int]]] = {}
-
-            def to_min(t: str) -> Optional[int]:
-                t = (t or "").strip()
-                if not t or ":" not in t:
-                    return None
-                try:
-                    hh, mm = t.split(":", 1)
-                    return int(hh) * 60 + int(mm)
-                except Exception:
-                    return None
-
-            def to_hhmm(m: int) -> str:
-                return f"{m//60:02d}:{m%60:02d}"
-
-            # 1+2) BASIS + OVERLAY parallel pro Tag laden
-            async def fetch_day(day_dt: datetime):
-                return await self._fetch_day_bundle(monday, day_dt, use_current_week_mode=True)
-                """
-                # Basis je nach Modus:
-                # - week_offset==0: mobil PlanKlYYYYMMDD.xml
-                # - week_offset!=0: Indiware Wochenplan (SPlanKl_SwXX.xml) wenn verfügbar; sonst mobil PlanKl
-                if int(self.week_offset) != 0:
-                    indi = await self._ensure_indiware_week(monday)
-                    if indi and indi.get("ok") and isinstance(indi.get("day_map"), dict):
-                        day_num = (day_dt.weekday() + 1)  # Mo=1..Fr=5
-                        base_lessons = list(indi["day_map"].get(day_num, []))
-                        base_stand = indi.get("stand", "") or ""
-                        ov_task = asyncio.create_task(self._fetch_vplan_overlay_lessons(day_dt))
-                        (overlay_lessons, overlay_stand, overlay_available) = await ov_task
-                        stand = overlay_stand or base_stand or ""
-                        return base_lessons, overlay_lessons, stand, overlay_available
-                base_task = asyncio.create_task(self._fetch_mobil_plan_lessons(day_dt))
-                ov_task = asyncio.create_task(self._fetch_vplan_overlay_lessons(day_dt))
-                (base_lessons, base_stand), (overlay_lessons, overlay_stand, overlay_available) = await asyncio.gather(base_task, ov_task)
-                # Prefer overlay timestamp if present (typischerweise der tagesaktuelle Stand)
-                stand = overlay_stand or base_stand or ""
-                return base_lessons, overlay_lessons, stand, overlay_available
-
-                """
-            day_results = await asyncio.gather(*(fetch_day(d) for d in day_dates))
-
-            # --- Updated/Stand timestamps (best-effort, per day) ---
-            updated_days: List[str] = [_norm_ts(r[2]) if (len(r) > 2 and r[2]) else "" for r in day_results]
-            updated_raw: str = next((u for u in updated_days if u), "")
-            updated_error: str = "" if updated_raw else "no updated timestamp found in day XML (PlanKl/VplanKl)"
-            vplan_missing_days: List[bool] = [not bool(r[3]) for r in day_results]
-            vplan_available_by_date: Dict[str, bool] = {
-                ymd(day_dt): bool(result[3]) for day_dt, result in zip(day_dates, day_results)
-            }
-            exact_cells_by_date_time, exact_updated_by_date, exact_available_by_date = self._build_exact_week_maps(
-                day_dates,
-                day_results,
+            await self._probe_week(monday, api=api)
+        except Exception as err:
+            _LOGGER.debug("%s: revalidating week %s failed: %s", self.name, ymd(monday), err)
+
+    async def async_get_week(self, monday: datetime) -> Optional[MergedWeek]:
+        """Week for the week API: merged on first request, then served from the
+        cache and revalidated in the background once older than PROBE_WEEK_TTL.
+        The live week is kept current by the regular refresh. Weeks the refresh
+        does not keep are stored in the separate API cache."""
+        week = self.cached_week(monday)
+        if week is None:
+            try:
+                return await self._probe_week(monday, api=True)
+            except Exception as err:
+                _LOGGER.debug("%s: week %s failed: %s", self.name, ymd(monday), err)
+                return None
+        if not week.live and not self._week_fresh(week):
+            # dort erneuern, wo die Woche liegt (Haupt-Cache oder API-Cache)
+            api = self._cached_week(monday, live=week.live) is not week
+            # an den Entry gebunden: wird beim Entladen abgebrochen
+            self.entry.async_create_background_task(
+                self.hass,
+                self._revalidate_week(monday, api=api),
+                f"{DOMAIN}_week_{self.entry.entry_id}_{ymd(monday)}",
             )
-            exact_cells_by_date_time = await self._enrich_exact_maps_with_wplan(day_dates, exact_cells_by_date_time)
-            exact_cells_by_date_time = await self._enrich_exact_maps_with_wplan_html(monday, exact_cells_by_date_time)
+        return week
+
+    def _compose_data(self, monday: datetime, week: MergedWeek) -> Dict[str, Any]:
+        """Build the coordinator payload for the selected week from merged weeks."""
+        day_dates = week.day_dates
+
+        # --- Updated/Stand timestamps (best-effort, per day) ---
+        updated_days: List[str] = week.updated_days
+        updated_raw: str = next((u for u in updated_days if u), "")
+        updated_error: str = "" if updated_raw else "no updated timestamp found in day XML (PlanKl/VplanKl)"
+        vplan_missing_days: List[bool] = [not a for a in week.available]
+        vplan_available_by_date: Dict[str, bool] = week.available_by_date()
+        exact_cells_by_date_time = week.exact_cells_by_date_time()
+        exact_updated_by_date = week.updated_by_date()
+
+        # Nachbarwochen für exact_cells_by_date_time (rollierende Ansicht der Card), soweit im Cache
+        for week_delta in NEIGHBOUR_WEEK_DELTAS:
+            probe_monday = monday + timedelta(weeks=week_delta)
+            probe = self._cached_week(probe_monday, live=False)
+            if probe is None:
+                continue
+            exact_cells_by_date_time.update(probe.exact_cells_by_date_time())
+            exact_updated_by_date.update(probe.updated_by_date())
+            vplan_available_by_date.update(probe.available_by_date())
+
+        meta: Dict[str, Any] = {
+            "school_id": self.school_id,
+            "class": self.target,
+            "week_start": ymd(monday),
+            "days": [ymd(d) for d in day_dates],
+            "updated_days": updated_days,
+            "updated_raw": updated_raw,
+            "updated_error": updated_error,
+            "vplan_missing_days": vplan_missing_days,
+            "vplan_available_by_date": vplan_available_by_date,
+            "exact_cells_by_date_time": exact_cells_by_date_time,
+            "exact_updated_by_date": exact_updated_by_date,
+            "show_room": self.show_room,
+            "show_teacher": self.show_teacher,
+            "wplan_enabled": self.wplan_enabled,
+            "wplan_days": self.wplan_days,
+            "source": "mobil PlanKl (Basis) + vplan/vdaten VplanKl (Overlay) + optional mobil WPlanKl",
+            "no_plan": False,
+            "week_offset": int(self.week_offset),
+        }
+        if not week.has_data:
+            meta.update({"no_plan": True, "reason": "Keine Daten (Ferien / nichts veröffentlicht)"})
+            return {"rows": [], "rows_table": [], "meta": meta}
+        return {"rows": week.rows, "rows_table": week.rows_table(), "meta": meta}
+
+    # -------- Week offset --------
+    async def async_set_week_offset(self, offset: int) -> None:
+        """Switch the selected week.
+
+        Publishes instantly from the per-week cache (filled by the neighbour-week
+        probes of earlier refreshes) and revalidates in the background. On a cache
+        miss the refresh is only scheduled, so the number entity never waits for it.
+        """
+        offset = int(offset)
+        if offset == int(self.week_offset) and self.data is not None:
+            return
+        self.week_offset = offset
+
+        monday = self.selected_monday()
+        week = self._cached_week(monday, live=offset == 0)
+        if week is not None:
+            data = self._compose_data(monday, week)
+            self._mark_published(await self.hass.async_add_executor_job(data_fingerprint, data))
+            self.async_set_updated_data(data)
+
+        # an den Entry gebunden: wird beim Entladen abgebrochen
+        self.entry.async_create_background_task(
+            self.hass,
+            self.async_request_refresh(),
+            f"{DOMAIN}_week_offset_{self.entry.entry_id}",
+        )
 
-            for week_delta in (-2, -1, 1, 2):
+    async def _async_build_data(self) -> Dict[str, Any]:
+        try:
+            monday = self.selected_monday()
+            live = int(self.week_offset) == 0
+
+            # Konfigurierte Nachbarwochen: nur wenn nicht im Cache oder älter als PROBE_WEEK_TTL
+            stale_probes = []
+            for week_delta in self.probe_deltas:
                 probe_monday = monday + timedelta(weeks=week_delta)
-                probe_dates = weekdays_for_monday(probe_monday)
-                probe_results = await asyncio.gather(
-                    *(self._fetch_day_bundle(probe_monday, d, use_current_week_mode=False) for d in probe_dates)
+                probe = self._cached_week(probe_monday, live=False)
+                if probe is None or not self._week_fresh(probe):
+                    stale_probes.append(probe_monday)
+
+            # Gewählte Woche und Nachbarwochen laufen parallel. Das Budget setzt der
+            # gemeinsame Request-Scheduler (Requests pro Host, gewählte Woche zuerst).
+            week, *_probes = await asyncio.gather(
+                self._merge_selected_week(monday, live),
+                *(self._probe_week(m) for m in stale_probes),
+            )
+
+            data = self._compose_data(monday, week)
+            if week.has_data:
+                return data
+
+            meta = data["meta"]
+            # Ferien / keine Daten in dieser Woche: Wochenplan-HTML als Fallback-Basis
+            # (exact_cells_by_date_time bleibt wie bisher aus den Zeilen der Woche)
+            wrows = await self._fetch_wplan_fallback_rows()
+            if wrows:
+                meta.update(
+                    {
+                        "source": "fallback: wplan/plan.html (Wochenplan HTML) – solange PlanKl/VplanKl leer ist",
+                        "wplan_fallback_used": True,
+                        "no_plan": False,
+                        "reason": "",
+                    }
                 )
-                probe_rows, _probe_base_any, _probe_overlay_any = await self._build_rows_from_day_results(probe_dates, probe_results)
-                probe_cells = self._build_exact_maps_from_rows(probe_dates, probe_rows)
-                probe_updated = {ymd(day_dt): _norm_ts(result[2]) if result[2] else "" for day_dt, result in zip(probe_dates, probe_results)}
-                probe_available = {ymd(day_dt): bool(result[3]) for day_dt, result in zip(probe_dates, probe_results)}
-                exact_cells_by_date_time.update(probe_cells)
-                exact_updated_by_date.update(probe_updated)
-                exact_available_by_date.update(probe_available)
-                vplan_available_by_date.update(probe_available)
-
-            base_any = False
-            overlay_any = False
-
-            for col_idx, (base_lessons, overlay_lessons, _stand, _overlay_available) in enumerate(day_results):
-                if base_lessons:
-                    base_any = True
-                if overlay_lessons:
-                    overlay_any = True
-
-                # ---- BASIS anwenden ----
-                for (stunde, fach, lehrer, raum, start, end) in base_lessons:
-                    if not stunde or stunde <= 0:
-                        continue
-
-                    row = by_hour.get(stunde)
-                    if not row:
-                        row = {"time": f"{stunde}.", "start": "", "end": "", "cells": ["", "", "", "", ""]}
-                        by_hour[stunde] = row
-
-                    smin = to_min(start)
-                    emin = to_min(end)
-                    cur_s, cur_e = time_minmax.get(stunde, (None, None))
-                    if smin is not None:
-                        cur_s = smin if cur_s is None else min(cur_s, smin)
-                    if emin is not None:
-                        cur_e = emin if cur_e is None else max(cur_e, emin)
-                    time_minmax[stunde] = (cur_s, cur_e)
-
-                    fach = (fach or "").strip()
-                    lehrer = (lehrer or "").strip()
-                    raum = (raum or "").strip()
-
-                    lines: List[str] = []
-                    lines.extend(_format_text(fach))
-                    if self.show_room and raum:
-                        lines.append(raum)
-                    if self.show_teacher and lehrer:
-                        lines.append(lehrer)
-
-                    cell = "\n".join([l for l in lines if l]).strip()
-                    if cell:
-                        row["cells"][col_idx] = _append_parallel(row["cells"][col_idx] or "", cell)
-
-                # ---- OVERLAY anwenden ----
-                for (stunde, fach, lehrer, raum, start, end) in overlay_lessons:
-                    if not stunde or stunde <= 0:
-                        continue
-
-                    row = by_hour.get(stunde)
-                    if not row:
-                        row = {"time": f"{stunde}.", "start": "", "end": "", "cells": ["", "", "", "", ""]}
-                        by_hour[stunde] = row
-
-                    smin = to_min(start)
-                    emin = to_min(end)
-                    cur_s, cur_e = time_minmax.get(stunde, (None, None))
-                    if cur_s is None and smin is not None:
-                        cur_s = smin
-                    if cur_e is None and emin is not None:
-                        cur_e = emin
-                    time_minmax[stunde] = (cur_s, cur_e)
-
-                    fach = (fach or "").strip()
-                    lehrer = (lehrer or "").strip()
-                    raum = (raum or "").strip()
-
-                    lines = []
-                    lines.extend(_format_text(fach))
-                    if self.show_room and raum:
-                        lines.append(raum)
-                    if self.show_teacher and lehrer:
-                        lines.append(lehrer)
-
-                    overlay_cell = "\n".join([l for l in lines if l]).strip()
-                    if not overlay_cell:
-                        continue
-
-                    base_cell = (row["cells"][col_idx] or "").strip()
-                    row["cells"][col_idx] = _merge_cells(base_cell, overlay_cell)
-
-            # 3) Optional: WPlan-Infos (Zusatztext)
-            if self.wplan_enabled and self.show_sub_text:
-                # Hinweis: wplan_days ist aktuell UI/Option; hier wird weiterhin nur Mo..Fr der gewählten Woche enriched.
-                for day_dt in day_dates:
-                    info_map = await self._fetch_wplan_info(day_dt)
-                    if not info_map:
-                        continue
-                    for (day_num, hour), info in info_map.items():
-                        if day_num < 1 or day_num > 5:
-                            continue
-                        col_idx = day_num - 1
-                        if not hour or hour <= 0:
-                            continue
-
-                        info_lines = _format_text(info)
-                        if not info_lines:
-                            continue
-
-                        row = by_hour.get(hour)
-                        if not row:
-                            row = {"time": f"{hour}.", "start": "", "end": "", "cells": ["", "", "", "", ""]}
-                            by_hour[hour] = row
-
-                        base_cell = (row["cells"][col_idx] or "").strip()
-                        row["cells"][col_idx] = _merge_cells(base_cell, "\n".join(info_lines))
-
-            # Zeiten setzen
-            for h, row in by_hour.items():
-                s, e = time_minmax.get(h, (None, None))
-                if s is not None:
-                    row["start"] = to_hhmm(s)
-                if e is not None:
-                    row["end"] = to_hhmm(e)
-
-            hours = sorted(by_hour.keys())
-            rows = [by_hour[h] for h in hours]
-            for row in rows:
-                row["cells"] = [c.strip() if c and c.strip() else "" for c in row["cells"]]
-            exact_cells_by_date_time.update(self._build_exact_maps_from_rows(day_dates, rows))
-
-            # Ferien / keine Daten in dieser Woche
-            if not base_any and not overlay_any:
-                # Fallback: Wenn noch keine PlanKl/VplanKl-Daten veröffentlicht sind,
-                # aber der Wochenplan (wplan/plan.html) bereits Inhalte hat, nutze diesen als Basis.
-                if self.wplan_enabled:
-                    try:
-                        html_text = await self.api.fetch_wplan_html(self.school_id)
-                        wrows = parse_wplan_html_to_rows(html_text)
-                        if wrows:
-                            day_labels = ["Mo", "Di", "Mi", "Do", "Fr"]
-                            rows_table = []
-                            for r in wrows:
-                                cells = r.get("cells") or ["", "", "", "", ""]
-                                while len(cells) < 5:
-                                    cells.append("")
-                                row_tab = {"time": r.get("time",""), "start": r.get("start",""), "end": r.get("end","")}
-                                for di, dl in enumerate(day_labels):
-                                    row_tab[dl] = cells[di] if di < len(cells) else ""
-                                rows_table.append(row_tab)
-                            meta = {
-                                "school_id": self.school_id,
-                                "class": self.target,
-                                "week_start": ymd(monday),
-                                "days": [ymd(d) for d in day_dates],
-                                "updated_days": updated_days,
-                                "updated_raw": updated_raw,
-                                "updated_error": updated_error,
-                                "vplan_missing_days": vplan_missing_days,
-                                "vplan_available_by_date": vplan_available_by_date,
-                                "exact_cells_by_date_time": exact_cells_by_date_time,
-                                "exact_updated_by_date": exact_updated_by_date,
-                                "show_room": self.show_room,
-                                "show_teacher": self.show_teacher,
-                                "wplan_enabled": self.wplan_enabled,
-                                "wplan_days": self.wplan_days,
-                                "source": "fallback: wplan/plan.html (Wochenplan HTML) – solange PlanKl/VplanKl leer ist",
-                                "wplan_fallback_used": True,
-                                "no_plan": False,
-                                "reason": "",
-                                "week_offset": int(self.week_offset),
-                            }
-                            return {"rows": wrows, "rows_table": rows_table, "meta": meta}
-                    except Exception as err:
-                        _LOGGER.debug("WPlan HTML fallback failed: %s", err)
-                return {
-                    "rows": [],
-                    "rows_table": [],
-                    "meta": {
-                        "school_id": self.school_id,
-                        "class": self.target,
-                        "week_start": ymd(monday),
-                        "days": [ymd(d) for d in day_dates],
-                        "updated_days": updated_days,
-                        "updated_raw": updated_raw,
-                        "updated_error": updated_error,
-                        "vplan_missing_days": vplan_missing_days,
-                        "vplan_available_by_date": vplan_available_by_date,
-                        "exact_cells_by_date_time": exact_cells_by_date_time,
-                        "exact_updated_by_date": exact_updated_by_date,
-                        "show_room": self.show_room,
-                        "show_teacher": self.show_teacher,
-                        "wplan_enabled": self.wplan_enabled,
-                        "wplan_days": self.wplan_days,
-                        "source": "mobil PlanKl (Basis) + vplan/vdaten VplanKl (Overlay) + optional mobil WPlanKl",
-                        "no_plan": True,
-                        "reason": "Keine Daten (Ferien / nichts veröffentlicht)",
-                        "week_offset": int(self.week_offset),
-                    },
-                }
-
-            # rows_table (Mo/Di/...) für Karten, die keine `cells[]` lesen
-            day_labels = ["Mo", "Di", "Mi", "Do", "Fr"]
-            rows_table: List[Dict[str, Any]] = []
-            for r in rows:
-                cells = r.get("cells") or ["", "", "", "", ""]
-                while len(cells) < 5:
-                    cells.append("")
-                d: Dict[str, Any] = {
-                    "time": r.get("time", ""),
-                    "start": r.get("start", ""),
-                    "end": r.get("end", ""),
-                }
-                for i, lab in enumerate(day_labels):
-                    d[lab] = (cells[i] or "").strip()
-                rows_table.append(d)
-
-            return {
-                "rows": rows,
-                "rows_table": rows_table,
-                "meta": {
-                    "school_id": self.school_id,
-                    "class": self.target,
-                    "week_start": ymd(monday),
-                    "days": [ymd(d) for d in day_dates],
-                    "updated_days": updated_days,
-                    "updated_raw": updated_raw,
-                    "updated_error": updated_error,
-                    "vplan_missing_days": vplan_missing_days,
-                    "vplan_available_by_date": vplan_available_by_date,
-                    "exact_cells_by_date_time": exact_cells_by_date_time,
-                    "exact_updated_by_date": exact_updated_by_date,
-                    "show_room": self.show_room,
-                    "show_teacher": self.show_teacher,
-                    "wplan_enabled": self.wplan_enabled,
-                    "wplan_days": self.wplan_days,
-                    "source": "mobil PlanKl (Basis) + vplan/vdaten VplanKl (Overlay) + optional mobil WPlanKl",
-                    "no_plan": False,
-                    "week_offset": int(self.week_offset),
-                },
-            }
+                return {"rows": wrows, "rows_table": rows_to_table(wrows), "meta": meta}
+
+            return data
 
         except Exception as err:
             raise UpdateFailed(str(err)) from err
+
+    async def _merge_selected_week(self, monday: datetime, live: bool) -> MergedWeek:
+        # BASIS + OVERLAY (+ optional WPlan-Infos) der gewählten Woche -> ein Merge;
+        # ihre Requests gehen im Scheduler vor Nachbar- und API-Wochen
+        with request_priority(PRIORITY_CURRENT):
+            week = await self._merge_week(monday, use_current_week_mode=True)
+        week.live = live
+        self._store_week(week)
+        return week
+
+    async def _fetch_wplan_fallback_rows(self) -> List[Dict[str, Any]]:
+        """Wenn noch keine PlanKl/VplanKl-Daten veröffentlicht sind, aber der Wochenplan
+        (wplan/plan.html) bereits Inhalte hat, dient dieser als Basis."""
+        if not self.wplan_enabled:
+            return []
+        try:
+            with request_priority(PRIORITY_BACKGROUND):
+                html_text = await self.hub.fetch_wplan_html()
+            rows = await self.hub.async_parse(parse_wplan_html_to_rows, html_text)
+            # Kopie: das Parse-Ergebnis ist im Cache geteilt
+            return [dict(r, cells=list(r.get("cells") or [])) for r in rows]
+        except Exception as err:
+            _LOGGER.debug("WPlan HTML fallback failed: %s", err)
+            return []
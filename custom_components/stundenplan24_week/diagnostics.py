@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import SPlanCoordinator
+from .scheduler import async_get_scheduler
+
+TO_REDACT = {"username", "password"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> Dict[str, Any]:
+    """Config entry plus the live refresh/cache counters of its coordinator."""
+    coordinator: SPlanCoordinator = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "coordinator": coordinator.diagnostics(),
+        "scheduler": async_get_scheduler(hass).stats(),
+    }
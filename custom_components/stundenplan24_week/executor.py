@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, TypeVar
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, callback
+
+from .const import DATA_PROCESS_POOL, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# Worker des optionalen Process-Pools (große Schulen: mehrere MB XML pro Refresh)
+PROCESS_POOL_WORKERS = 2
+
+
+def async_get_process_pool(hass: HomeAssistant) -> ProcessPoolExecutor:
+    """Return the integration-wide process pool (creating it on demand)."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    pool = domain_data.get(DATA_PROCESS_POOL)
+    if pool is None:
+        # spawn statt fork: der HA-Prozess ist multithreaded
+        pool = domain_data[DATA_PROCESS_POOL] = ProcessPoolExecutor(
+            max_workers=PROCESS_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+        @callback
+        def _stop(_event: Event) -> None:
+            async_shutdown_process_pool(hass)
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _stop)
+    return pool
+
+
+@callback
+def async_shutdown_process_pool(hass: HomeAssistant) -> None:
+    pool = hass.data.get(DOMAIN, {}).pop(DATA_PROCESS_POOL, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def async_run_cpu_bound(
+    hass: HomeAssistant, func: Callable[..., _T], *args: Any, processes: bool = False
+) -> _T:
+    """Run func(*args) off the event loop: in HA's executor or in the process pool.
+
+    With processes=True func, args and the result must be picklable; if the
+    pool broke (killed worker), the job is redone in the thread executor.
+    """
+    if processes:
+        try:
+            return await hass.loop.run_in_executor(async_get_process_pool(hass), func, *args)
+        except BrokenProcessPool:
+            _LOGGER.warning("Parser process pool broke, falling back to the thread executor")
+            async_shutdown_process_pool(hass)
+    return await hass.async_add_executor_job(func, *args)
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Optional, Set, Tuple
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_HUBS, DOMAIN
+from .executor import async_run_cpu_bound, async_shutdown_process_pool
+from .parse_cache import ParseCache, ParseKey
+from .scheduler import RequestScheduler, async_get_scheduler
+from .store import PERSISTED_RESPONSES, ResponseCacheStore
+from .stundenplan24_api import Stundenplan24Api
+
+_LOGGER = logging.getLogger(__name__)
+
+# Wie lange ein geladener Payload für andere Klassen derselben Schule gültig bleibt.
+# Coordinatoren mit gleichem Intervall laufen typischerweise innerhalb weniger
+# Sekunden nacheinander -> ein Fenster von 2 Minuten deckt einen Refresh-Zyklus ab.
+FETCH_WINDOW_SECONDS = 120
+
+HubKey = Tuple[str, str, str]
+
+
+def hub_key(school_id: str, username: str, password: str) -> HubKey:
+    return ((school_id or "").strip().lower(), (username or "").strip(), (password or "").strip())
+
+
+class SchoolWeekFiles:
+    """Which SPlanKl_SwNN.xml files are known to exist on the server.
+
+    Lets the Indiware fallback ("nearest earlier available week") jump straight
+    to the nearest known week instead of probing backwards one request at a
+    time. Missing files are remembered by the Api's 404 cache only.
+    Persisted with the response cache; reset when the basis stand changes.
+    """
+
+    def __init__(self) -> None:
+        self.stand = ""
+        self.present: Set[int] = set()
+        # geändert seit dem letzten Speichern
+        self.dirty = False
+
+    def sync_basis(self, stand: str) -> None:
+        if stand and stand != self.stand:
+            if self.stand:
+                self.present.clear()
+            self.stand = stand
+            self.dirty = True
+
+    def mark(self, sw: int, exists: bool) -> None:
+        if exists == (sw in self.present):
+            return
+        if exists:
+            self.present.add(sw)
+        else:
+            self.present.discard(sw)
+        self.dirty = True
+
+    def nearest_present(self, sw: int, floor: int) -> Optional[int]:
+        """Closest known week before sw (not below floor), None if none is known."""
+        earlier = [p for p in self.present if floor <= p < sw]
+        return max(earlier) if earlier else None
+
+    def export(self) -> Dict[str, Any]:
+        return {"stand": self.stand, "present": sorted(self.present)}
+
+    def import_(self, data: Dict[str, Any]) -> None:
+        try:
+            self.stand = str(data.get("stand") or "")
+            self.present = {int(sw) for sw in data.get("present") or ()}
+        except (TypeError, ValueError, AttributeError):
+            self.present = set()
+
+
+class SchoolHub:
+    """Shared fetch hub for all config entries (classes) of one school.
+
+    Every class entry of a school needs the same school-wide files
+    (PlanKl*.xml, VplanKl*.xml, WPlanKl_*.xml, SPlanKl_*.xml, plan.html).
+    The hub downloads each of them once per refresh window and hands the raw
+    payload to every coordinator, so upstream traffic scales with the number
+    of schools instead of the number of classes.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        school_id: str,
+        username: str,
+        password: str,
+        window_s: float = FETCH_WINDOW_SECONDS,
+        scheduler: Optional[RequestScheduler] = None,
+    ) -> None:
+        self.hass = hass
+        self.school_id = (school_id or "").strip()
+        self.api = Stundenplan24Api(hass, (username or "").strip(), (password or "").strip(), scheduler=scheduler)
+
+        self._window = float(window_s)
+        # normalized url -> (fetch started at, shared task)
+        self._payloads: Dict[str, Tuple[float, asyncio.Future]] = {}
+        # entry_id -> class_key der Klasse (für die gestreamten Klassen-Indizes)
+        self._entries: Dict[str, str] = {}
+        # Content-addressed Parse-Cache, geteilt von allen Klassen der Schule
+        self.parse_cache = ParseCache()
+        # laufende Parser-Jobs (gleicher Payload von mehreren Klassen -> ein Job)
+        self._parsing: Dict[ParseKey, asyncio.Future] = {}
+        # Einträge mit Option process_pool: Parser laufen dann im Process-Pool
+        self._process_pool_entries: Set[str] = set()
+
+        # Persistierte Roh-Antworten (ETag/Last-Modified + Body) für schnellen Start
+        self._response_store = ResponseCacheStore(hass, self.school_id, (username or "").strip())
+        self._responses_loaded: Optional[asyncio.Future] = None
+        # Vorhandene/fehlende Indiware-Schulwochen (persistiert)
+        self.school_weeks = SchoolWeekFiles()
+
+    # -------- Lifecycle --------
+    def attach(self, entry_id: str, class_key: str = "") -> None:
+        if class_key or entry_id not in self._entries:
+            self._entries[entry_id] = class_key
+
+    def use_process_pool(self, entry_id: str, enabled: bool) -> None:
+        if enabled:
+            self._process_pool_entries.add(entry_id)
+        else:
+            self._process_pool_entries.discard(entry_id)
+
+    def detach(self, entry_id: str) -> bool:
+        """Detach an entry. Returns True when no entry uses the hub anymore."""
+        self._entries.pop(entry_id, None)
+        self._process_pool_entries.discard(entry_id)
+        if not self._entries:
+            self._payloads.clear()
+            self.parse_cache.clear()
+            return True
+        return False
+
+    # -------- Persistence --------
+    async def _load_responses(self) -> None:
+        try:
+            stored = await self._response_store.async_load()
+            self.api.import_responses(stored["responses"])
+            self.school_weeks.import_(stored["school_weeks"])
+        except Exception as err:
+            _LOGGER.debug("Restoring cached responses failed: %s", err)
+
+    async def async_load_responses(self) -> None:
+        """Seed the API response cache from disk (once per hub)."""
+        if self._responses_loaded is None:
+            self._responses_loaded = asyncio.ensure_future(self._load_responses())
+        await asyncio.shield(self._responses_loaded)
+
+    def async_schedule_save(self) -> None:
+        """Persist the most recently used responses and known school weeks (debounced).
+
+        No-op unless a body/validator or a known school week changed since the
+        last call: all-304 refreshes do not rewrite the cached XML bodies.
+        """
+        if not (self.api.responses_dirty or self.school_weeks.dirty):
+            return
+        self.api.responses_dirty = False
+        self.school_weeks.dirty = False
+        self._response_store.async_schedule_save(
+            lambda: {
+                "responses": self.api.export_responses(PERSISTED_RESPONSES),
+                "school_weeks": self.school_weeks.export(),
+            }
+        )
+
+    # -------- Fetching --------
+    def _prune(self, now: float) -> None:
+        for key in [k for k, (ts, fut) in self._payloads.items() if fut.done() and now - ts >= self._window]:
+            self._payloads.pop(key, None)
+
+    async def fetch_text(self, url: str, *, referer: Optional[str] = None, xhr: bool = False) -> str:
+        """Fetch url once per refresh window; concurrent callers share the request."""
+        key = url
+        now = time.monotonic()
+
+        hit = self._payloads.get(key)
+        if hit is not None:
+            started, fut = hit
+            if not fut.done() or now - started < self._window:
+                return await asyncio.shield(fut)
+
+        fut = asyncio.ensure_future(self.api.fetch_text(url, referer=referer, xhr=xhr))
+        self._payloads[key] = (now, fut)
+        self._prune(now)
+        return await asyncio.shield(fut)
+
+    @property
+    def wanted_classes(self) -> FrozenSet[str]:
+        """class_keys of all attached entries: the streaming parsers stop once these are read."""
+        return frozenset(k for k in self._entries.values() if k)
+
+    async def async_parse(self, parser: Callable[..., Any], text: str, *args: Hashable) -> Any:
+        """Run parser(text, *args) once per distinct payload content, off the event loop.
+
+        Unchanged files (304 or byte-identical 200) cost one hash on the loop; the
+        result is shared by all classes of the school and must be treated as
+        read-only. New payloads are parsed in HA's executor, or in the process
+        pool when an entry of this school enabled it.
+        """
+        key = self.parse_cache.key(parser, text, *args)
+        fut = self._parsing.get(key)
+        if fut is None:
+            hit, result = self.parse_cache.lookup(key)
+            if hit:
+                return result
+            fut = asyncio.ensure_future(
+                async_run_cpu_bound(self.hass, parser, text, *args, processes=bool(self._process_pool_entries))
+            )
+            self._parsing[key] = fut
+            fut.add_done_callback(lambda _f, k=key: self._parsing.pop(k, None))
+        return self.parse_cache.store(key, await asyncio.shield(fut))
+
+    # School-bound counterparts of the Stundenplan24Api fetch helpers.
+    async def fetch_vplan_kl_day_xml(self, day) -> str:
+        return await self.fetch_text(
+            self.api.url_vplan_kl_day_xml(self.school_id, day),
+            referer=self.api.url_vplan_root(self.school_id),
+            xhr=True,
+        )
+
+    async def fetch_mobil_wplan_kl_day_xml(self, day) -> str:
+        return await self.fetch_text(
+            self.api.url_mobil_wplan_kl_day(self.school_id, day),
+            referer=self.api.url_vplan_root(self.school_id),
+            xhr=False,
+        )
+
+    async def fetch_wplan_day_xml(self, day) -> str:
+        """Wochenplan Online day XML, falling back to the mobil WPlanKl file."""
+        try:
+            return await self.fetch_text(
+                self.api.url_wplan_day_xml(self.school_id, day),
+                referer=self.api.url_wplan_root(self.school_id),
+                xhr=False,
+            )
+        except Exception:
+            return await self.fetch_mobil_wplan_kl_day_xml(day)
+
+    async def fetch_wplan_html(self, day=None) -> str:
+        return await self.fetch_text(
+            self.api.url_wplan_html(self.school_id, day),
+            referer=self.api.url_wplan_root(self.school_id),
+            xhr=False,
+        )
+
+
+def async_get_hub(hass: HomeAssistant, entry: ConfigEntry) -> SchoolHub:
+    """Return the shared hub for the entry's school + credentials (creating it on demand)."""
+    school_id = (entry.data.get("school_id") or "").strip()
+    username = (entry.data.get("username") or "").strip()
+    password = (entry.data.get("password") or "").strip()
+
+    hubs: Dict[HubKey, SchoolHub] = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_HUBS, {})
+    key = hub_key(school_id, username, password)
+    hub = hubs.get(key)
+    if hub is None:
+        hub = SchoolHub(hass, school_id, username, password, scheduler=async_get_scheduler(hass))
+        hubs[key] = hub
+        _LOGGER.debug("Created fetch hub for school %s", hub.school_id)
+    hub.attach(entry.entry_id)
+    return hub
+
+
+def async_release_hub(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Detach the entry from its hub and drop the hub once unused."""
+    hubs: Dict[HubKey, SchoolHub] = hass.data.get(DOMAIN, {}).get(DATA_HUBS, {})
+    key = hub_key(entry.data.get("school_id") or "", entry.data.get("username") or "", entry.data.get("password") or "")
+    hub = hubs.get(key)
+    if hub is not None and hub.detach(entry.entry_id):
+        hubs.pop(key, None)
+        _LOGGER.debug("Released fetch hub for school %s", hub.school_id)
+    if not hubs:
+        async_shutdown_process_pool(hass)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import sys
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+# Verschiedene Uhrzeiten einer Schule: wenige Dutzend
+_TIME_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=_TIME_CACHE_SIZE)
+def to_min(t: str) -> Optional[int]:
+    """'07:45' -> 465 (None if empty/invalid); memoized, the same labels repeat all week."""
+    t = (t or "").strip()
+    if not t or ":" not in t:
+        return None
+    try:
+        hh, mm = t.split(":", 1)
+        return int(hh) * 60 + int(mm)
+    except Exception:
+        return None
+
+
+class Lesson(NamedTuple):
+    """One lesson of a class; a plain 6-tuple (stunde, fach_plus_info, lehrer, raum, start, end)."""
+
+    stunde: int
+    fach: str
+    lehrer: str
+    raum: str
+    start: str
+    end: str
+
+
+def _intern(value: str) -> str:
+    return sys.intern(value) if value else ""
+
+
+def make_lesson(stunde: int, fach: str, lehrer: str, raum: str, start: str, end: str) -> Lesson:
+    """Lesson with interned strings: "MA", "R101", "07:45" exist once per process
+    instead of once per parsed file, day and class entry."""
+    return Lesson(stunde, _intern(fach), _intern(lehrer), _intern(raum), _intern(start), _intern(end))
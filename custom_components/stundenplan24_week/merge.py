@@ -0,0 +1,406 @@
+from __future__ import annotations
+
+import re
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .lesson import to_min
+
+# (stunde, fach_plus_info, lehrer, raum, start, end) – Parser liefern lesson.Lesson
+LessonTuple = Tuple[int, str, str, str, str, str]
+# (base_lessons, overlay_lessons, stand, overlay_available) pro Tag
+DayResult = Tuple[List[LessonTuple], List[LessonTuple], str, bool]
+
+DAY_LABELS = ["Mo", "Di", "Mi", "Do", "Fr"]
+
+
+# -----------------------------
+# Text helpers
+# -----------------------------
+# Vorkompilierte Muster (statt re-Cache-Lookup bei jedem Aufruf)
+_RE_CANCEL = re.compile(r"\b(fällt\s+aus|entfällt)\b")
+_RE_MOVE = re.compile(r"\b(verlegt|verschoben)\b")
+_RE_MARKER = re.compile(r"^[🟠🔴]\s*")
+_RE_CODE_GROUP = re.compile(r"\b[A-ZÄÖÜ]{1,4}(?:/[A-ZÄÖÜ]{1,4}){1,3}\b")
+_RE_CODE = re.compile(r"\b[A-ZÄÖÜ]{2,6}\b")
+_RE_PERSON = re.compile(r"\b(Frau|Herr)\s+[A-Za-zÄÖÜäöüß\-]+\b", re.IGNORECASE)
+_RE_WS = re.compile(r"\s+")
+_RE_TS = re.compile(r"(\d{1,2}\.\d{1,2}\.\d{4})\s*,?\s*(\d{1,2}:\d{2})")
+
+# Die Texte wiederholen sich Woche für Woche ("entfällt", "Vertretung für ...")
+TEXT_CACHE_SIZE = 2048
+
+
+def _dedupe_key(s: str) -> str:
+    x = (s or "").strip()
+    x = _RE_MARKER.sub("", x)
+    # Entferne Lehrer-Kürzel / Fachkürzel (GEO, EN, G/R/W, etc.)
+    x = _RE_CODE_GROUP.sub(" ", x)
+    x = _RE_CODE.sub(" ", x)
+    # Entferne 'Frau/Herr Name'
+    x = _RE_PERSON.sub(" ", x)
+    x = x.lower()
+    return _RE_WS.sub(" ", x).strip()
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def _format_text_cached(text: str) -> Tuple[str, ...]:
+    t = (text or "").strip()
+    if not t:
+        return ()
+
+    lines: List[str] = []
+    for raw_line in t.splitlines():
+        parts = [p.strip() for p in raw_line.split(";") if p.strip()]
+        lines.extend(parts if parts else [raw_line.strip()])
+
+    out: List[str] = []
+    for line in lines:
+        l = line.strip()
+        if not l:
+            continue
+        low = l.lower()
+        if _RE_CANCEL.search(low):
+            l = f"🔴 {l}"
+        elif _RE_MOVE.search(low):
+            l = f"🟠 {l}"
+        out.append(l)
+
+    # Duplikate vermeiden (Stundenplan24 liefert teils denselben Hinweis doppelt,
+    # z.B. einmal mit Lehrername und einmal mit Kürzel).
+    seen: set[str] = set()
+    deduped: List[str] = []
+    for l in out:
+        k = _dedupe_key(l)
+        if k and k in seen:
+            continue
+        if k:
+            seen.add(k)
+        deduped.append(l)
+
+    return tuple(deduped)
+
+
+def _format_text(text: str) -> List[str]:
+    """Zeilen normalisieren + simple Markierungen (🔴 bei Ausfall, 🟠 bei Verlegung)."""
+    return list(_format_text_cached(text))
+
+
+def _append_parallel(base: str, extra: str) -> str:
+    """Wenn in derselben Stunde mehrere Gruppen parallel existieren, Inhalte untereinander anhängen."""
+    b = (base or "").strip()
+    e = (extra or "").strip()
+    if not e:
+        return b
+    if not b:
+        return e
+    if e in b:
+        return b
+    return f"{b}\n\n{e}"
+
+
+def _norm_ts(s: str) -> str:
+    """Normalize timestamps like '17.02.2026 13:49' or '17.02.2026, 13:49' -> '17.02.2026, 13:49'."""
+    if not s:
+        return ""
+    s = " ".join(str(s).strip().split())
+    m = _RE_TS.search(s)
+    if not m:
+        return s
+    return f"{m.group(1)}, {m.group(2)}"
+
+
+class OverlayType:
+    NONE = 0
+    CANCEL = 1
+    MOVE = 2
+    SUBSTITUTE = 3
+    SPECIAL = 4
+
+
+# Schlüsselwörter -> Art der Änderung; alle in EINEM Durchlauf gesucht.
+# Bei mehreren Treffern gewinnt die kleinste Priorität (Ausfall vor Verlegung vor Sonderfall).
+_OVERLAY_KEYWORDS: Dict[str, int] = {
+    "fällt aus": OverlayType.CANCEL,
+    "entfällt": OverlayType.CANCEL,
+    "verlegt": OverlayType.MOVE,
+    "verschoben": OverlayType.MOVE,
+    "zeugnis": OverlayType.SPECIAL,
+    "präventionstag": OverlayType.SPECIAL,
+    "wandertag": OverlayType.SPECIAL,
+    "projekttag": OverlayType.SPECIAL,
+    "methodentag": OverlayType.SPECIAL,
+    "studientag": OverlayType.SPECIAL,
+    "unterrichtsfrei": OverlayType.SPECIAL,
+    "prüfung": OverlayType.SPECIAL,
+    "klausur": OverlayType.SPECIAL,
+}
+_OVERLAY_PRIORITY = (OverlayType.CANCEL, OverlayType.MOVE, OverlayType.SPECIAL)
+# Lookahead: überlappende Treffer werden ebenfalls gefunden (wie "x in t")
+_RE_OVERLAY_KEYWORDS = re.compile(
+    "(?=(" + "|".join(re.escape(k) for k in sorted(_OVERLAY_KEYWORDS, key=len, reverse=True)) + "))"
+)
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def _classify_overlay(txt: str) -> int:
+    """Erkennt Art der Änderung im VPlan/WPlan."""
+    t = (txt or "").strip().lower()
+    if not t:
+        return OverlayType.NONE
+
+    found = {_OVERLAY_KEYWORDS[m.group(1)] for m in _RE_OVERLAY_KEYWORDS.finditer(t)}
+    for kind in _OVERLAY_PRIORITY:
+        if kind in found:
+            return kind
+
+    # " für " / " statt " und alles Übrige: Vertretung
+    return OverlayType.SUBSTITUTE
+
+
+def text_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss counters of the memoized text helpers (for meta/diagnostics)."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for name, fn in (("format_text", _format_text_cached), ("classify_overlay", _classify_overlay)):
+        info = fn.cache_info()
+        total = info.hits + info.misses
+        out[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+            "hit_rate": round(info.hits / total, 3) if total else 0.0,
+        }
+    return out
+
+
+def _merge_cells(base: str, overlay: str) -> str:
+    """Intelligentes Mergen von Basis-Stundenplan und Vertretung."""
+    b = (base or "").strip()
+    o = (overlay or "").strip()
+    if not o:
+        return b
+
+    t = _classify_overlay(o)
+
+    if t == OverlayType.CANCEL:
+        return f"—\n{o}".strip()
+
+    if t == OverlayType.MOVE:
+        if o.startswith("---") or o.startswith("—"):
+            return o
+        if b:
+            b_lines = [x.strip() for x in b.splitlines() if x.strip()]
+            o_lines = [x.strip() for x in o.splitlines() if x.strip()]
+            for ln in o_lines:
+                if ln not in b_lines:
+                    b_lines.append(ln)
+            return "\n".join(b_lines).strip()
+        return o
+
+    if t == OverlayType.SPECIAL:
+        return o
+
+    # SUBSTITUTE: ersetzt den Inhalt (Vertretungslehrer/Fach/Raum)
+    return o
+
+
+# -----------------------------
+# Merge engine
+# -----------------------------
+def _to_hhmm(m: int) -> str:
+    return f"{m//60:02d}:{m%60:02d}"
+
+
+def _date_key(d: datetime) -> str:
+    return d.strftime("%Y%m%d")
+
+
+def _lesson_cell(fach: str, lehrer: str, raum: str, show_room: bool, show_teacher: bool) -> str:
+    lines: List[str] = list(_format_text((fach or "").strip()))
+    raum = (raum or "").strip()
+    lehrer = (lehrer or "").strip()
+    if show_room and raum:
+        lines.append(raum)
+    if show_teacher and lehrer:
+        lines.append(lehrer)
+    return "\n".join([l for l in lines if l]).strip()
+
+
+@dataclass
+class MergedWeek:
+    """One merged school week (Mo..Fr); rows / rows_table / exact maps are views of it."""
+
+    day_dates: List[datetime]
+    rows: List[Dict[str, Any]]
+    stands: List[str] = field(default_factory=list)
+    available: List[bool] = field(default_factory=list)
+    base_any: bool = False
+    overlay_any: bool = False
+    # live=True: aktuelle Kalenderwoche aus mobil PlanKl + VplanKl; sonst Indiware-Wochenplan
+    live: bool = False
+    computed_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def monday(self) -> datetime:
+        return self.day_dates[0]
+
+    @property
+    def has_data(self) -> bool:
+        return self.base_any or self.overlay_any
+
+    @property
+    def updated_days(self) -> List[str]:
+        return [_norm_ts(st) if st else "" for st in self.stands]
+
+    def updated_by_date(self) -> Dict[str, str]:
+        return {_date_key(d): u for d, u in zip(self.day_dates, self.updated_days)}
+
+    def available_by_date(self) -> Dict[str, bool]:
+        return {_date_key(d): bool(a) for d, a in zip(self.day_dates, self.available)}
+
+    def exact_cells_by_date_time(self) -> Dict[str, Dict[str, str]]:
+        """date -> time label -> cell, for date-accurate (rolling) rendering."""
+        out: Dict[str, Dict[str, str]] = {_date_key(d): {} for d in self.day_dates}
+        for row in self.rows:
+            time_key = (row.get("time") or "").strip()
+            if not time_key:
+                continue
+            cells = row.get("cells") or []
+            for idx, day_dt in enumerate(self.day_dates):
+                if idx < len(cells):
+                    out[_date_key(day_dt)][time_key] = (cells[idx] or "").strip()
+        return out
+
+    def rows_table(self) -> List[Dict[str, Any]]:
+        return rows_to_table(self.rows)
+
+
+def rows_to_table(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """rows (cells[]) -> Legacy-Format mit Keys Mo..Fr für Karten, die keine cells[] lesen."""
+    table: List[Dict[str, Any]] = []
+    for r in rows:
+        cells = list(r.get("cells") or [])
+        while len(cells) < len(DAY_LABELS):
+            cells.append("")
+        d: Dict[str, Any] = {
+            "time": r.get("time", ""),
+            "start": r.get("start", ""),
+            "end": r.get("end", ""),
+        }
+        for i, lab in enumerate(DAY_LABELS):
+            d[lab] = (cells[i] or "").strip()
+        table.append(d)
+    return table
+
+
+def merge_week(
+    day_dates: List[datetime],
+    day_results: List[DayResult],
+    info_maps: Iterable[Dict[Tuple[int, int], str]] = (),
+    show_room: bool = True,
+    show_teacher: bool = False,
+) -> MergedWeek:
+    """Merge base lessons, overlays and optional WPlan infos of one week.
+
+    - Basis: parallele Gruppen werden untereinander angehängt, Zeiten min/max.
+    - Overlay: _merge_cells (Ausfall/Verlegung/Vertretung), Zeiten nur ergänzen.
+    - Infos: {(day_num, hour): text} aus WPlanKl, ebenfalls via _merge_cells.
+    """
+    by_hour: Dict[int, Dict[str, Any]] = {}
+    time_minmax: Dict[int, Tuple[Optional[int], Optional[int]]] = {}
+    base_any = False
+    overlay_any = False
+
+    def row_for(stunde: int) -> Dict[str, Any]:
+        row = by_hour.get(stunde)
+        if not row:
+            row = {"time": f"{stunde}.", "start": "", "end": "", "cells": ["", "", "", "", ""]}
+            by_hour[stunde] = row
+        return row
+
+    for col_idx, (base_lessons, overlay_lessons, _stand, _available) in enumerate(day_results):
+        if base_lessons:
+            base_any = True
+        if overlay_lessons:
+            overlay_any = True
+
+        # ---- BASIS anwenden ----
+        for (stunde, fach, lehrer, raum, start, end) in base_lessons:
+            if not stunde or stunde <= 0:
+                continue
+            row = row_for(stunde)
+
+            smin = to_min(start)
+            emin = to_min(end)
+            cur_s, cur_e = time_minmax.get(stunde, (None, None))
+            if smin is not None:
+                cur_s = smin if cur_s is None else min(cur_s, smin)
+            if emin is not None:
+                cur_e = emin if cur_e is None else max(cur_e, emin)
+            time_minmax[stunde] = (cur_s, cur_e)
+
+            cell = _lesson_cell(fach, lehrer, raum, show_room, show_teacher)
+            if cell:
+                row["cells"][col_idx] = _append_parallel(row["cells"][col_idx] or "", cell)
+
+        # ---- OVERLAY anwenden ----
+        for (stunde, fach, lehrer, raum, start, end) in overlay_lessons:
+            if not stunde or stunde <= 0:
+                continue
+            row = row_for(stunde)
+
+            smin = to_min(start)
+            emin = to_min(end)
+            cur_s, cur_e = time_minmax.get(stunde, (None, None))
+            if cur_s is None and smin is not None:
+                cur_s = smin
+            if cur_e is None and emin is not None:
+                cur_e = emin
+            time_minmax[stunde] = (cur_s, cur_e)
+
+            overlay_cell = _lesson_cell(fach, lehrer, raum, show_room, show_teacher)
+            if not overlay_cell:
+                continue
+
+            base_cell = (row["cells"][col_idx] or "").strip()
+            row["cells"][col_idx] = _merge_cells(base_cell, overlay_cell)
+
+    # ---- Optional: WPlan-Infos (Zusatztext) ----
+    for info_map in info_maps:
+        for (day_num, hour), info in (info_map or {}).items():
+            if day_num < 1 or day_num > 5 or not hour or hour <= 0:
+                continue
+
+            info_lines = _format_text(info)
+            if not info_lines:
+                continue
+
+            row = row_for(hour)
+            col_idx = day_num - 1
+            base_cell = (row["cells"][col_idx] or "").strip()
+            row["cells"][col_idx] = _merge_cells(base_cell, "\n".join(info_lines))
+
+    # Zeiten setzen
+    for h, row in by_hour.items():
+        s, e = time_minmax.get(h, (None, None))
+        if s is not None:
+            row["start"] = _to_hhmm(s)
+        if e is not None:
+            row["end"] = _to_hhmm(e)
+
+    rows = [by_hour[h] for h in sorted(by_hour.keys())]
+    for row in rows:
+        row["cells"] = [c.strip() if c and c.strip() else "" for c in row["cells"]]
+
+    return MergedWeek(
+        day_dates=list(day_dates),
+        rows=rows,
+        stands=[r[2] if len(r) > 2 else "" for r in day_results],
+        available=[bool(r[3]) if len(r) > 3 else False for r in day_results],
+        base_any=base_any,
+        overlay_any=overlay_any,
+    )
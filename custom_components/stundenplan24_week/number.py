@@ -111,9 +111,8 @@ class WeekOffsetNumber(NumberEntity, RestoreEntity):
         # Push into coordinator (if already created)
         coord = self.hass.data.get(DOMAIN, {}).get(self.entry.entry_id)
         if coord is not None:
-            coord.week_offset = int(self._native_value or 0)
-            # sofort refresh, damit UI nach HA-Neustart nicht "zurückspringt"
-            await coord.async_request_refresh()
+            # sofort umschalten, damit UI nach HA-Neustart nicht "zurückspringt"
+            await coord.async_set_week_offset(int(self._native_value or 0))
 
         self.async_write_ha_state()
 
@@ -129,7 +128,7 @@ class WeekOffsetNumber(NumberEntity, RestoreEntity):
 
         coord = self.hass.data.get(DOMAIN, {}).get(self.entry.entry_id)
         if coord is not None:
-            coord.week_offset = v_int
-            await coord.async_request_refresh()
+            # sofort aus dem Wochen-Cache, Revalidierung läuft im Hintergrund
+            await coord.async_set_week_offset(v_int)
 
         self.async_write_ha_state()
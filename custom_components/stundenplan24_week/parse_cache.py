@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+ParseKey = Tuple[str, Tuple[Hashable, ...], bytes]
+
+# Standardgröße: reicht für ~5 Wochen x (PlanKl, VplanKl, WPlanKl, HTML) + SPlanKl_Sw
+DEFAULT_PARSE_CACHE_SIZE = 256
+
+
+def payload_digest(text: str) -> bytes:
+    """Content hash of a fetched payload (fast, 128 bit)."""
+    return hashlib.blake2b((text or "").encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+class ParseCache:
+    """Bounded LRU cache: (parser, args, payload hash) -> parsed result.
+
+    Stundenplan24 files are usually byte-identical between polls, even when the
+    server answers with 200. Hashing the payload is far cheaper than building an
+    ElementTree, so an unchanged file costs one hash. Cached results are shared
+    between callers and must be treated as read-only.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_PARSE_CACHE_SIZE) -> None:
+        self._maxsize = max(1, int(maxsize))
+        self._data: "OrderedDict[ParseKey, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @staticmethod
+    def key(parser: Callable[..., Any], text: str, *args: Hashable) -> ParseKey:
+        name = f"{getattr(parser, '__module__', '')}.{getattr(parser, '__qualname__', repr(parser))}"
+        return (name, args, payload_digest(text))
+
+    def lookup(self, key: ParseKey) -> Tuple[bool, Any]:
+        """(True, result) for a cached payload, (False, None) otherwise."""
+        try:
+            result = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return True, result
+
+    def store(self, key: ParseKey, result: Any) -> Any:
+        self._data[key] = result
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self._maxsize,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -1,72 +1,57 @@
 from __future__ import annotations
 
 import html
-from typing import List, Tuple
-import xml.etree.ElementTree as ET
+import re
+from typing import AbstractSet, Dict, List, Optional, Tuple
+
+from .lesson import make_lesson
+from .xml_backend import ParseError, iter_elements
+
+_RE_LEADING_ZEROS = re.compile(r"^0+(?=\d)")
 
 
 def _txt(el) -> str:
     if el is None:
         return ""
-    raw = "".join(el.itertext()) if hasattr(el, "itertext") else (el.text or "")
+    if len(el) == 0 or not hasattr(el, "itertext"):
+        # Blattknoten (Normalfall): kein itertext() nötig
+        raw = el.text or ""
+    else:
+        raw = "".join(el.itertext())
     raw = html.unescape(raw or "").replace("\xa0", " ").strip()
     if raw.lower() == "&nbsp;":
         return ""
     return raw
 
 
-def parse_plan_klassen_xml(
-    xml_text: str,
-    target_class: str,
-    show_room: bool = True,
-    show_teacher: bool = False,
-) -> List[Tuple[int, str, str, str, str, str]]:
-    """
-    Returns list of tuples:
-      (stunde:int, fach_plus_info:str, lehrer:str, raum:str, start:str, end:str)
-
-    Wichtig:
-    - Info aus <If> wird IMMER als zweite Zeile an "fach" angehängt (wenn vorhanden),
-      damit wir es später sauber formatieren können (Zeilenumbrüche, Markierung etc.).
-    """
-    out: List[Tuple[int, str, str, str, str, str]] = []
-
-    if not xml_text:
-        return out
-
-    try:
-        root = ET.fromstring(xml_text)
-    except Exception:
-        return out
+def class_key(name: str) -> str:
+    """Normalisierter Klassen-Schlüssel: trim, lower, führende Nullen weg (09c/9C -> 9c)."""
+    k = (name or "").strip().lower()
+    return _RE_LEADING_ZEROS.sub("", k)
 
-    tclass = (target_class or "").strip()
-    if not tclass:
-        return out
-
-    kl_node = None
-    for kl in root.findall(".//Klassen/Kl"):
-        kurz = _txt(kl.find("Kurz"))
-        if kurz == tclass:
-            kl_node = kl
-            break
-
-    if kl_node is None:
-        return out
 
+def _parse_kl_lessons(kl_node) -> List[Tuple[int, str, str, str, str, str]]:
+    """Lessons of one <Kl> node (see parse_plan_klassen_xml for the tuple layout)."""
+    out: List[Tuple[int, str, str, str, str, str]] = []
     for std in kl_node.findall(".//Pl/Std"):
-        st_txt = _txt(std.find("St"))
+        # Kinder einmal einsammeln statt sieben find()-Aufrufe (erstes Vorkommen gewinnt)
+        fields = {}
+        for child in std:
+            fields.setdefault(child.tag, child)
+
+        st_txt = _txt(fields.get("St"))
         try:
             stunde = int(st_txt)
         except Exception:
             continue
 
-        start = _txt(std.find("Beginn"))
-        end = _txt(std.find("Ende"))
+        start = _txt(fields.get("Beginn"))
+        end = _txt(fields.get("Ende"))
 
-        fach = _txt(std.find("Fa"))
-        lehrer = _txt(std.find("Le"))
-        raum = _txt(std.find("Ra"))
-        info = _txt(std.find("If"))
+        fach = _txt(fields.get("Fa"))
+        lehrer = _txt(fields.get("Le"))
+        raum = _txt(fields.get("Ra"))
+        info = _txt(fields.get("If"))
 
         fach = (fach or "").strip()
         info = (info or "").strip()
@@ -85,6 +70,70 @@ def parse_plan_klassen_xml(
         if info and info not in fach_plus:
             fach_plus = f"{fach_plus}\n{info}".strip()
 
-        out.append((stunde, fach_plus, lehrer, raum, start, end))
+        out.append(make_lesson(stunde, fach_plus, lehrer, raum, start, end))
+    return out
+
+
+def index_plan_klassen_xml(
+    xml_text: str, wanted: Optional[AbstractSet[str]] = None
+) -> Dict[str, List[Tuple[int, str, str, str, str, str]]]:
+    """
+    Parst PlanKl*.xml / VplanKl*.xml EINMAL und liefert {class_key(Kurz): lessons}
+    für alle Klassen der Schule. Lookups für beliebige Schreibweisen der Klasse
+    (09c/9c/9C) sind danach ein einziger Dict-Zugriff.
+
+    Mit `wanted` (Menge von class_keys) werden nur diese Klassen geparst und das
+    Lesen endet, sobald alle gefunden sind.
+    """
+    index: Dict[str, List[Tuple[int, str, str, str, str, str]]] = {}
+    if not xml_text:
+        return index
+
+    try:
+        for parent_tag, kl in iter_elements(xml_text, {"Kl"}):
+            if parent_tag != "Klassen":
+                continue
+            key = class_key(_txt(kl.find("Kurz")))
+            if not key or key in index or (wanted is not None and key not in wanted):
+                # wie parse_plan_klassen_xml: erster Treffer gewinnt
+                continue
+            index[key] = _parse_kl_lessons(kl)
+            if wanted is not None and len(index) >= len(wanted):
+                break
+    except ParseError:
+        return {}
+
+    return index
+
+
+def parse_plan_klassen_xml(
+    xml_text: str,
+    target_class: str,
+    show_room: bool = True,
+    show_teacher: bool = False,
+) -> List[Tuple[int, str, str, str, str, str]]:
+    """
+    Returns list of tuples:
+      (stunde:int, fach_plus_info:str, lehrer:str, raum:str, start:str, end:str)
+
+    Wichtig:
+    - Info aus <If> wird IMMER als zweite Zeile an "fach" angehängt (wenn vorhanden),
+      damit wir es später sauber formatieren können (Zeilenumbrüche, Markierung etc.).
+    """
+    out: List[Tuple[int, str, str, str, str, str]] = []
+
+    if not xml_text:
+        return out
+
+    tclass = (target_class or "").strip()
+    if not tclass:
+        return out
+
+    try:
+        for parent_tag, kl in iter_elements(xml_text, {"Kl"}):
+            if parent_tag == "Klassen" and _txt(kl.find("Kurz")) == tclass:
+                return _parse_kl_lessons(kl)
+    except ParseError:
+        return out
 
     return out
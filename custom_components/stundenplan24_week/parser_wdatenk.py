@@ -2,8 +2,12 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date, datetime
-from typing import Dict, List, Optional, Tuple
-import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional, Tuple
+
+from .lesson import make_lesson
+from .parser import class_key
+from .schedule import SchoolWeekIndex
+from .xml_backend import fromstring, iter_elements
 
 
 # Home Assistant Card erwartet days typischerweise Mo..Fr
@@ -19,7 +23,7 @@ class WeekInfo:
     wo: Optional[str] = None  # "A"/"B"/None
 
 
-def _text(node: Optional[ET.Element]) -> str:
+def _text(node: Optional[Any]) -> str:
     return (node.text or "").strip() if node is not None else ""
 
 
@@ -39,7 +43,7 @@ def parse_basis(basis_xml: str) -> Tuple[List[str], List[WeekInfo]]:
     - Klassen (Kurz)
     - Schulwochen (Sw + Von/Bis + optional SwWo)
     """
-    root = ET.fromstring(basis_xml)
+    root = fromstring(basis_xml)
 
     classes: List[str] = []
     for n in root.findall(".//Klassen/Kl/Kurz"):
@@ -94,7 +98,7 @@ def parse_weekplan_splan(xml_text: str, target_class: str, show_room: bool, show
     ]
     Zeiten sind hier meist nicht enthalten -> Card kann über manuelle rows fallbacken.
     """
-    root = ET.fromstring(xml_text)
+    root = fromstring(xml_text)
 
     # Std-Knoten kommen oft unter <Pl><Std>...</Std></Pl> oder direkt <Std>
     std_nodes = root.findall(".//Std")
@@ -165,3 +169,100 @@ def parse_weekplan_splan(xml_text: str, target_class: str, show_room: bool, show
         )
 
     return rows
+
+
+def parse_splankl_basis(xml_text: str) -> dict:
+    """Parse SPlanKl_Basis.xml -> {ba_sw_von, ba_sw_bis, weeks[(sw, von, bis)], index, stand}."""
+    root = fromstring(xml_text)
+    basis = root.find("Basisdaten")
+    ba_sw_von = int(basis.findtext("BaSwVon", "0")) if basis is not None else 0
+    ba_sw_bis = int(basis.findtext("BaSwBis", "0")) if basis is not None else 0
+
+    weeks = []
+    sws = root.find("Schulwochen")
+    if sws is not None:
+        for sw_el in sws.findall("Sw"):
+            sw_num = int((sw_el.text or "0").strip() or 0)
+            sw_von = sw_el.attrib.get("SwDatumVon", "")
+            sw_bis = sw_el.attrib.get("SwDatumBis", "")
+            weeks.append((sw_num, sw_von, sw_bis))
+    stand = (root.findtext("Kopf/zeitstempel", "") or "").strip()
+    return {
+        "ba_sw_von": ba_sw_von,
+        "ba_sw_bis": ba_sw_bis,
+        "weeks": weeks,
+        # sortierter Datumsindex: Schulwoche per bisect statt strptime je Woche und Lookup
+        "index": SchoolWeekIndex(weeks),
+        "stand": stand,
+    }
+
+
+def parse_splankl_sw_for_target(
+    xml_text: str, target: str
+) -> Tuple[Dict[int, List[Tuple[int, str, str, str, str, str]]], str]:
+    """Parse SPlanKl_SwXX.xml for target class. Returns (day_num->lessons, stand_ts)."""
+    day_map: Dict[int, List[Tuple[int, str, str, str, str, str]]] = {1: [], 2: [], 3: [], 4: [], 5: []}
+    stand = ""
+
+    # locate class node by Kurz (gestreamt: Lesen endet beim Treffer, nur ein <Kl> im Speicher);
+    # Vergleich wie in allen Parsern über class_key (09c/9c/9C)
+    target_key = class_key(target)
+    kl_node = None
+    for parent_tag, el in iter_elements(xml_text, {"zeitstempel", "Kl"}):
+        if el.tag == "zeitstempel":
+            if parent_tag == "Kopf" and not stand:
+                stand = (el.text or "").strip()
+        elif parent_tag == "Klassen" and target_key and class_key(el.findtext("Kurz", "") or "") == target_key:
+            kl_node = el
+            break
+    if kl_node is None:
+        return day_map, stand
+
+    # times per hour
+    times: Dict[int, Tuple[str, str]] = {}
+    stunden = kl_node.find("Stunden")
+    if stunden is not None:
+        for st in stunden.findall("St"):
+            try:
+                h = int((st.text or "0").strip() or 0)
+            except Exception:
+                continue
+            z1 = (st.attrib.get("StZeit", "") or "").strip()
+            z2 = (st.attrib.get("StZeitBis", "") or "").strip()
+            if h > 0:
+                times[h] = (z1, z2)
+
+    pl = kl_node.find("Pl")
+    if pl is None:
+        return day_map, stand
+
+    for std in pl.findall("Std"):
+        try:
+            day_num = int((std.findtext("PlTg", "0") or "0").strip() or 0)
+            hour = int((std.findtext("PlSt", "0") or "0").strip() or 0)
+        except Exception:
+            continue
+        if day_num < 1 or day_num > 5 or hour <= 0:
+            continue
+
+        fach = (std.findtext("PlFa", "") or "").strip()
+        lehrer = (std.findtext("PlLe", "") or "").strip()
+        raum = (std.findtext("PlRa", "") or "").strip()
+        info = (
+            (std.findtext("PlIf", "") or "").strip()
+            or (std.findtext("If", "") or "").strip()
+            or (std.findtext("Info", "") or "").strip()
+            or (std.findtext("Text", "") or "").strip()
+        )
+
+        if not fach and info:
+            fach = info
+            info = ""
+
+        if info and info not in fach:
+            fach = f"{fach}\n{info}".strip()
+
+        start, end = times.get(hour, ("", ""))
+        day_map[day_num].append(make_lesson(hour, fach, lehrer, raum, start, end))
+
+    return day_map, stand
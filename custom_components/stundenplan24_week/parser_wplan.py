@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import html
-from typing import Dict, List, Tuple
-import xml.etree.ElementTree as ET
+from typing import AbstractSet, Dict, List, Optional, Tuple
+
+from .lesson import make_lesson
+from .parser import class_key
+from .xml_backend import ParseError, fromstring, iter_elements
 
 RED_MARKER = "[[sp-red]]"
 
@@ -10,7 +13,11 @@ RED_MARKER = "[[sp-red]]"
 def _txt(el) -> str:
     if el is None:
         return ""
-    raw = "".join(el.itertext()) if hasattr(el, "itertext") else (el.text or "")
+    if len(el) == 0 or not hasattr(el, "itertext"):
+        # Blattknoten (Normalfall): kein itertext() nötig
+        raw = el.text or ""
+    else:
+        raw = "".join(el.itertext())
     raw = html.unescape(raw or "").replace("\xa0", " ").strip()
     if raw.lower() == "&nbsp;":
         return ""
@@ -26,6 +33,54 @@ def _mark_if_changed(value: str, changed: str) -> str:
     return v
 
 
+def _wplan_node_kurz(node) -> str:
+    return _txt(node.find("Kurz")) or _txt(node.find("klasse")) or _txt(node.find("Klasse"))
+
+
+def _wplan_node_entry(node) -> Optional[Tuple[int, int, str]]:
+    """(day_num, hour, info) of one WPlanKl node, None if day/hour are unusable."""
+    # Tag/TagNr und Stunde
+    day_txt = _txt(node.find("Tag")) or _txt(node.find("Day")) or _txt(node.find("T"))
+    hour_txt = _txt(node.find("St")) or _txt(node.find("Std")) or _txt(node.find("Stunde"))
+
+    try:
+        day_num = int(day_txt)
+        hour = int(hour_txt)
+    except Exception:
+        return None
+
+    info = _txt(node.find("If")) or _txt(node.find("Info")) or _txt(node.find("Text"))
+    return day_num, hour, info
+
+
+def index_wplan_xml(xml_text: str) -> Dict[str, Dict[Tuple[int, int], str]]:
+    """
+    Wie parse_wplan_xml, aber für alle Klassen in einem Durchlauf:
+    {class_key(Kurz): {(day_num, hour): info_text}}
+    """
+    index: Dict[str, Dict[Tuple[int, int], str]] = {}
+    if not xml_text:
+        return index
+
+    try:
+        root = fromstring(xml_text)
+    except Exception:
+        return index
+
+    for node in root.findall(".//*"):
+        key = class_key(_wplan_node_kurz(node))
+        if not key:
+            continue
+        entry = _wplan_node_entry(node)
+        if entry is None:
+            continue
+        day_num, hour, info = entry
+        if info:
+            index.setdefault(key, {})[(day_num, hour)] = info
+
+    return index
+
+
 def parse_wplan_xml(xml_text: str, target_class: str) -> Dict[Tuple[int, int], str]:
     """
     Mobil WPlanKlYYYYMMDD.xml:
@@ -38,7 +93,7 @@ def parse_wplan_xml(xml_text: str, target_class: str) -> Dict[Tuple[int, int], s
         return out
 
     try:
-        root = ET.fromstring(xml_text)
+        root = fromstring(xml_text)
     except Exception:
         return out
 
@@ -48,27 +103,107 @@ def parse_wplan_xml(xml_text: str, target_class: str) -> Dict[Tuple[int, int], s
 
     # Sehr robust: suche Einträge, die Kurz/Klasse enthalten
     for node in root.findall(".//*"):
-        kurz = _txt(node.find("Kurz")) or _txt(node.find("klasse")) or _txt(node.find("Klasse"))
-        if kurz != tclass:
+        if _wplan_node_kurz(node) != tclass:
             continue
 
-        # Tag/TagNr und Stunde
-        day_txt = _txt(node.find("Tag")) or _txt(node.find("Day")) or _txt(node.find("T"))
-        hour_txt = _txt(node.find("St")) or _txt(node.find("Std")) or _txt(node.find("Stunde"))
+        entry = _wplan_node_entry(node)
+        if entry is None:
+            continue
+        day_num, hour, info = entry
+        if info:
+            out[(day_num, hour)] = info
+
+    return out
 
+
+def _parse_wplan_day_kl_lessons(kl) -> List[Tuple[int, str, str, str, str, str]]:
+    """Lessons of one <Kl> node of WPlanKl_YYYYMMDD.xml."""
+    out: List[Tuple[int, str, str, str, str, str]] = []
+    for std in kl.findall(".//Std"):
+        st_txt = _txt(std.find(".//St")) or _txt(std.find(".//Std")) or _txt(std.find(".//Stunde"))
         try:
-            day_num = int(day_txt)
-            hour = int(hour_txt)
+            stunde = int(st_txt)
         except Exception:
             continue
 
-        info = _txt(node.find("If")) or _txt(node.find("Info")) or _txt(node.find("Text"))
-        if info:
-            out[(day_num, hour)] = info
+        fa_node = std.find(".//Fa")
+        le_node = std.find(".//Le")
+        ra_node = std.find(".//Ra")
+
+        fach = _txt(fa_node) or _txt(std.find(".//Fach"))
+        lehrer = _txt(le_node) or _txt(std.find(".//Lehrer"))
+        raum = _txt(ra_node) or _txt(std.find(".//Raum"))
+        info = _txt(std.find(".//If")) or _txt(std.find(".//Info")) or _txt(std.find(".//Text"))
+        aend_fach = (fa_node.attrib.get("FaAe", "") if fa_node is not None else "").strip()
+        aend_lehrer = (le_node.attrib.get("LeAe", "") if le_node is not None else "").strip()
+        aend_raum = (ra_node.attrib.get("RaAe", "") if ra_node is not None else "").strip()
+
+        fach = (fach or "").strip()
+        lehrer = (lehrer or "").strip()
+        raum = (raum or "").strip()
+        info = (info or "").strip()
+
+        if fach in {"&nbsp;", "\xa0"}:
+            fach = ""
+        if lehrer in {"&nbsp;", "\xa0"}:
+            lehrer = ""
+        if raum in {"&nbsp;", "\xa0"}:
+            raum = ""
+
+        if not fach and info:
+            fach = info
+            info = ""
+
+        if not fach and not lehrer and not raum and not info:
+            continue
+
+        # Indiware shows a visible placeholder when the subject itself changed
+        # to "empty", e.g. canceled first lessons in future weeks.
+        if not fach and aend_fach == "FaGeaendert":
+            fach = "---"
+
+        fach = _mark_if_changed(fach, aend_fach)
+        lehrer = _mark_if_changed(lehrer, aend_lehrer)
+        raum = _mark_if_changed(raum, aend_raum)
+
+        fach_plus = fach
+        if info and info not in fach_plus:
+            fach_plus = f"{fach_plus}\n{info}".strip()
+
+        out.append(make_lesson(stunde, fach_plus, lehrer, raum, "", ""))
 
     return out
 
 
+def index_wplan_day_xml_lessons(
+    xml_text: str, wanted: Optional[AbstractSet[str]] = None
+) -> Dict[str, List[Tuple[int, str, str, str, str, str]]]:
+    """
+    Parse WPlanKl_YYYYMMDD.xml once for all classes: {class_key(Kurz): lessons}.
+    Mehrere <Kl>-Knoten derselben Klasse werden (wie in parse_wplan_day_xml_lessons)
+    aneinandergehängt.
+
+    Mit `wanted` werden nur diese Klassen geparst. Die Datei wird trotzdem bis
+    zum Ende gelesen: Blöcke derselben Klasse müssen nicht aufeinander folgen.
+    """
+    index: Dict[str, List[Tuple[int, str, str, str, str, str]]] = {}
+    if not xml_text:
+        return index
+
+    try:
+        for _parent_tag, kl in iter_elements(xml_text, {"Kl"}):
+            key = class_key(_txt(kl.find("Kurz")))
+            if not key:
+                continue
+            if wanted is not None and key not in wanted:
+                continue
+            index.setdefault(key, []).extend(_parse_wplan_day_kl_lessons(kl))
+    except ParseError:
+        return {}
+
+    return index
+
+
 def parse_wplan_day_xml_lessons(
     xml_text: str,
     target_class: str,
@@ -88,71 +223,16 @@ def parse_wplan_day_xml_lessons(
     if not xml_text:
         return out
 
-    try:
-        root = ET.fromstring(xml_text)
-    except Exception:
-        return out
-
     tclass = (target_class or "").strip()
     if not tclass:
         return out
 
-    for kl in root.findall(".//Kl"):
-        kurz = _txt(kl.find("Kurz"))
-        if kurz != tclass:
-            continue
-
-        for std in kl.findall(".//Std"):
-            st_txt = _txt(std.find(".//St")) or _txt(std.find(".//Std")) or _txt(std.find(".//Stunde"))
-            try:
-                stunde = int(st_txt)
-            except Exception:
-                continue
-
-            fa_node = std.find(".//Fa")
-            le_node = std.find(".//Le")
-            ra_node = std.find(".//Ra")
-
-            fach = _txt(fa_node) or _txt(std.find(".//Fach"))
-            lehrer = _txt(le_node) or _txt(std.find(".//Lehrer"))
-            raum = _txt(ra_node) or _txt(std.find(".//Raum"))
-            info = _txt(std.find(".//If")) or _txt(std.find(".//Info")) or _txt(std.find(".//Text"))
-            aend_fach = (fa_node.attrib.get("FaAe", "") if fa_node is not None else "").strip()
-            aend_lehrer = (le_node.attrib.get("LeAe", "") if le_node is not None else "").strip()
-            aend_raum = (ra_node.attrib.get("RaAe", "") if ra_node is not None else "").strip()
-
-            fach = (fach or "").strip()
-            lehrer = (lehrer or "").strip()
-            raum = (raum or "").strip()
-            info = (info or "").strip()
-
-            if fach in {"&nbsp;", "\xa0"}:
-                fach = ""
-            if lehrer in {"&nbsp;", "\xa0"}:
-                lehrer = ""
-            if raum in {"&nbsp;", "\xa0"}:
-                raum = ""
-
-            if not fach and info:
-                fach = info
-                info = ""
-
-            if not fach and not lehrer and not raum and not info:
-                continue
-
-            # Indiware shows a visible placeholder when the subject itself changed
-            # to "empty", e.g. canceled first lessons in future weeks.
-            if not fach and aend_fach == "FaGeaendert":
-                fach = "---"
-
-            fach = _mark_if_changed(fach, aend_fach)
-            lehrer = _mark_if_changed(lehrer, aend_lehrer)
-            raum = _mark_if_changed(raum, aend_raum)
-
-            fach_plus = fach
-            if info and info not in fach_plus:
-                fach_plus = f"{fach_plus}\n{info}".strip()
-
-            out.append((stunde, fach_plus, lehrer, raum, "", ""))
+    try:
+        # bis zum Ende lesen: weitere <Kl>-Blöcke der Klasse können später folgen
+        for _parent_tag, kl in iter_elements(xml_text, {"Kl"}):
+            if _txt(kl.find("Kurz")) == tclass:
+                out.extend(_parse_wplan_day_kl_lessons(kl))
+    except ParseError:
+        return []
 
     return out
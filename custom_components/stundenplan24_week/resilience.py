@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+# Antworten, bei denen ein erneuter Versuch sinnvoll ist (Überlast / Gateway)
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 20.0
+# Längere Retry-After-Vorgaben werden nicht abgewartet, sondern öffnen den Breaker
+MAX_RETRY_AFTER = 30.0
+
+# Breaker öffnet nach so vielen Fehlversuchen in Folge ...
+BREAKER_THRESHOLD = 3
+# ... für zunächst BREAKER_COOLDOWN Sekunden, bei erneutem Scheitern doppelt so lange
+BREAKER_COOLDOWN = 30.0
+BREAKER_MAX_COOLDOWN = 15 * 60.0
+# Ein Probe-Request im Half-Open-Zustand gilt spätestens danach als verloren
+BREAKER_PROBE_TIMEOUT = 120.0
+
+
+class CircuitOpenError(RuntimeError):
+    """Endpoint family is failing; request skipped without touching the network."""
+
+
+def endpoint_family(url: str) -> str:
+    """Group stundenplan24 URLs by backend (mobil, vplan, wplan/wdatenk, plan.html)."""
+    path = urlsplit(url).path.lower()
+    if "/mobil/" in path:
+        return "mobil"
+    if "/vplan/" in path:
+        return "vplan"
+    if path.endswith("/plan.html"):
+        return "plan_html"
+    if "/wplan/" in path:
+        return "wplan"
+    return "other"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header (delta seconds or HTTP date) -> seconds, None if absent/invalid."""
+    value = (value or "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(
+    attempt: int,
+    retry_after: Optional[float] = None,
+    rng: Callable[[], float] = random.random,
+) -> float:
+    """Delay before retry number `attempt` (1-based): full jitter, or Retry-After plus jitter."""
+    if retry_after is not None:
+        return min(retry_after, MAX_RETRY_AFTER) + rng() * BACKOFF_BASE
+    return rng() * min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for one endpoint family.
+
+    closed -> open after BREAKER_THRESHOLD failures in a row. While open every
+    request is refused. After the cooldown one probe request is let through
+    (half-open); its success closes the breaker, a failure reopens it with a
+    doubled cooldown.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self.failures = 0
+        self.opened_until = 0.0
+        self.cooldown = BREAKER_COOLDOWN
+        # Half-Open: solange clock() < _probe_until läuft bereits ein Probe-Request
+        self._probe_until = 0.0
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_until <= 0:
+            return "closed"
+        now = self._clock()
+        return "open" if now < self.opened_until or now < self._probe_until else "half_open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open":
+            self._probe_until = self._clock() + BREAKER_PROBE_TIMEOUT
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_until = 0.0
+        self.cooldown = BREAKER_COOLDOWN
+        self._probe_until = 0.0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probe_until > 0:
+            self._probe_until = 0.0
+            self.cooldown = min(BREAKER_MAX_COOLDOWN, self.cooldown * 2)
+            self._open(self.cooldown)
+        elif self.failures >= BREAKER_THRESHOLD and self.opened_until <= 0:
+            self._open(self.cooldown)
+
+    def trip(self, seconds: float) -> None:
+        """Open immediately (e.g. the server asked for a long Retry-After)."""
+        self.failures = max(self.failures, BREAKER_THRESHOLD)
+        self._probe_until = 0.0
+        self._open(min(BREAKER_MAX_COOLDOWN, max(seconds, BREAKER_COOLDOWN)))
+
+    def _open(self, seconds: float) -> None:
+        self.opened_until = self._clock() + seconds
+        self.trips += 1
+
+    def stats(self) -> Dict[str, Any]:
+        remaining = max(0.0, self.opened_until - self._clock())
+        return {"state": self.state, "failures": self.failures, "trips": self.trips, "retry_in": round(remaining, 1)}
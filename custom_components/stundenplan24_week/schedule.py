@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .lesson import to_min
+
+# Untergrenze für jedes Intervall (entspricht dem Minimum der Optionen)
+MIN_POLL_MINUTES = 5
+DAY_MINUTES = 24 * 60
+
+# Schultag: Fenster vor der ersten Stunde (hier ändern sich Vertretungen am häufigsten)
+MORNING_LEAD_MINUTES = 90
+# Untergrenzen im Morgenfenster / während des Unterrichts; das tatsächliche Intervall
+# folgt aus dem Tagesbudget (nie mehr Abrufe pro Tag als mit dem festen Intervall).
+# Jede Untergrenze ist höchstens FACTOR * Basisintervall: morgens und im Unterricht
+# wird ein kurz eingestelltes Intervall nie verlangsamt, abends höchstens um
+# EVENING_POLL_FACTOR (siehe _phase_floor)
+MORNING_POLL_MINUTES = 10
+MORNING_POLL_FACTOR = 1
+SCHOOL_HOURS_POLL_MINUTES = 30
+SCHOOL_HOURS_POLL_FACTOR = 1
+# Schultag: nach Unterrichtsende bis EVENING_END (Pläne für den nächsten Tag)
+EVENING_POLL_MINUTES = 120
+EVENING_POLL_FACTOR = 4
+EVENING_END_MINUTE = 22 * 60
+# Nachts wird bis zum nächsten Morgenfenster geschlafen.
+# Wochenende und Ferien: höchstens so lange, ebenfalls nie über das Morgenfenster hinaus
+OFF_DAY_POLL_MINUTES = 6 * 60
+HOLIDAY_POLL_MINUTES = 24 * 60
+
+# Fallback-Unterrichtszeiten, wenn die Zeilen keine Uhrzeiten enthalten
+DEFAULT_LESSON_WINDOW = (7 * 60 + 30, 15 * 60 + 30)
+
+# Wie weit nach dem nächsten Schultag gesucht wird
+_LOOKAHEAD_DAYS = 60
+
+DateRange = Tuple[date, date]
+
+
+def _parse_ddmmyyyy(value: str) -> Optional[date]:
+    try:
+        return datetime.strptime((value or "").strip(), "%d.%m.%Y").date()
+    except ValueError:
+        return None
+
+
+class SchoolWeekIndex:
+    """Schulwochen of SPlanKl_Basis.xml, parsed once and sorted for bisect lookups."""
+
+    __slots__ = ("_starts", "_ends", "_sws")
+
+    def __init__(self, weeks: Iterable[Tuple[int, str, str]]) -> None:
+        parsed = []
+        for (sw, von, bis) in weeks or ():
+            start, end = _parse_ddmmyyyy(von), _parse_ddmmyyyy(bis)
+            if start and end and start <= end:
+                parsed.append((start.toordinal(), end.toordinal(), int(sw)))
+        parsed.sort()
+        self._starts: List[int] = [p[0] for p in parsed]
+        self._ends: List[int] = [p[1] for p in parsed]
+        self._sws: List[int] = [p[2] for p in parsed]
+
+    def __len__(self) -> int:
+        return len(self._sws)
+
+    def sw_for_date(self, day: date) -> Optional[int]:
+        """Schulwoche containing day (None outside the calendar)."""
+        n = day.toordinal()
+        i = bisect_right(self._starts, n) - 1
+        if i >= 0 and n <= self._ends[i]:
+            return self._sws[i]
+        return None
+
+    def ranges(self) -> List[DateRange]:
+        return [(date.fromordinal(a), date.fromordinal(b)) for a, b in zip(self._starts, self._ends)]
+
+
+def school_week_ranges(basis: Optional[Dict[str, Any]]) -> Optional[List[DateRange]]:
+    """Date ranges of the Schulwochen in a parsed SPlanKl_Basis.xml (None = unknown)."""
+    if not basis:
+        return None
+    index = basis.get("index")
+    if not isinstance(index, SchoolWeekIndex):
+        index = SchoolWeekIndex(basis.get("weeks") or ())
+    return index.ranges() or None
+
+
+def is_school_day(day: date, ranges: Optional[Sequence[DateRange]]) -> bool:
+    """Mon-Fri inside a Schulwoche; without a calendar every weekday counts."""
+    if day.weekday() >= 5:
+        return False
+    if ranges is None:
+        return True
+    return any(start <= day <= end for (start, end) in ranges)
+
+
+def lesson_window(rows: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+    """(first lesson start, last lesson end) in minutes after midnight from plan rows."""
+    starts: List[int] = []
+    ends: List[int] = []
+    for row in rows or ():
+        s = to_min(row.get("start", ""))
+        e = to_min(row.get("end", ""))
+        if s is not None:
+            starts.append(s)
+        if e is not None:
+            ends.append(e)
+    if not starts or not ends or min(starts) >= max(ends):
+        return DEFAULT_LESSON_WINDOW
+    return min(starts), max(ends)
+
+
+def _next_morning(now: datetime, ranges: Optional[Sequence[DateRange]], first_lesson: int) -> Optional[datetime]:
+    """Start of the next morning window on a school day (today included)."""
+    offset = max(0, first_lesson - MORNING_LEAD_MINUTES)
+    for i in range(_LOOKAHEAD_DAYS + 1):
+        day = now.date() + timedelta(days=i)
+        if not is_school_day(day, ranges):
+            continue
+        wake = datetime.combine(day, datetime.min.time(), tzinfo=now.tzinfo) + timedelta(minutes=offset)
+        if wake > now:
+            return wake
+    return None
+
+
+def _phase_floor(minutes: int, factor: int, base: int) -> int:
+    """Floor of one phase: the fixed minimum, but never more than factor * base."""
+    return min(minutes, factor * base)
+
+
+def school_day_intervals(base_minutes: int, window: Tuple[int, int] = DEFAULT_LESSON_WINDOW) -> Tuple[int, int]:
+    """(interval from the morning window to the last lesson, evening interval) in minutes.
+
+    A school day gets the same number of polls as the fixed interval would
+    (DAY_MINUTES // base_minutes): the evening polls (from the last lesson to
+    EVENING_END_MINUTE) are taken off first, the rest is spread evenly over the
+    morning window and the lessons; the night is one sleep until the next morning.
+    """
+    base = max(MIN_POLL_MINUTES, int(base_minutes))
+    budget = max(1, DAY_MINUTES // base)
+    if budget == 1:
+        # ein Abruf pro Tag: am Morgen
+        return DAY_MINUTES, DAY_MINUTES
+    first, last = window
+    start = max(0, first - MORNING_LEAD_MINUTES)
+
+    evening = max(base, _phase_floor(EVENING_POLL_MINUTES, EVENING_POLL_FACTOR, base))
+    # Abruf am Unterrichtsende + weitere bis EVENING_END_MINUTE
+    evening_polls = 1 + max(0, EVENING_END_MINUTE - last - 1) // evening
+    if evening_polls >= budget:
+        # Budget reicht nicht für den Abend: nach Unterrichtsende bis zum Morgen schlafen
+        evening, evening_polls = DAY_MINUTES, 1
+    day_polls = max(1, budget - evening_polls)
+    fast = -(-max(1, last - start) // day_polls)
+    return fast, evening
+
+
+def next_poll_interval(
+    now: datetime,
+    base_minutes: int,
+    ranges: Optional[Sequence[DateRange]] = None,
+    window: Tuple[int, int] = DEFAULT_LESSON_WINDOW,
+) -> timedelta:
+    """Poll interval depending on time of day and the school calendar.
+
+    On school days the polls the user's interval allows per day are moved
+    into the morning window and the lessons (see school_day_intervals), never
+    more of them. Night, weekends and holidays poll at most every
+    base_minutes; slow phases never sleep past the next morning window.
+    """
+    base = max(MIN_POLL_MINUTES, int(base_minutes))
+    first, last = window
+    minute = now.hour * 60 + now.minute
+
+    if is_school_day(now.date(), ranges):
+        fast, evening = school_day_intervals(base, window)
+        if first - MORNING_LEAD_MINUTES <= minute < first:
+            return timedelta(minutes=max(fast, _phase_floor(MORNING_POLL_MINUTES, MORNING_POLL_FACTOR, base)))
+        if first <= minute < last:
+            return timedelta(minutes=max(fast, _phase_floor(SCHOOL_HOURS_POLL_MINUTES, SCHOOL_HOURS_POLL_FACTOR, base)))
+        # Abends nur, solange der nächste Abruf noch vor EVENING_END_MINUTE liegt
+        in_evening = last <= minute and minute + evening < EVENING_END_MINUTE
+        # sonst bis zum nächsten Morgenfenster schlafen (Begrenzung durch wake unten)
+        slow = evening if in_evening else DAY_MINUTES
+    elif now.weekday() >= 5:
+        slow = OFF_DAY_POLL_MINUTES
+    else:
+        slow = HOLIDAY_POLL_MINUTES
+
+    interval = timedelta(minutes=max(base, slow))
+    wake = _next_morning(now, ranges, first)
+    if wake is not None:
+        interval = min(interval, wake - now)
+    return max(interval, timedelta(minutes=MIN_POLL_MINUTES))
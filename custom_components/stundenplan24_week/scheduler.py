@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+from typing import AsyncIterator, Dict, Iterator, List, Tuple
+from urllib.parse import urlsplit
+
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_SCHEDULER, DOMAIN
+
+# Gleichzeitige Requests pro Host (über alle Schulen/Klassen hinweg)
+MAX_REQUESTS_PER_HOST = 4
+
+# Prioritätsklassen: kleinere Zahl = früher dran
+PRIORITY_CURRENT = 0  # aktuell angezeigte (gewählte) Woche
+PRIORITY_NORMAL = 1  # alles ohne eigene Angabe (z.B. Schulwochen-Kalender)
+PRIORITY_BACKGROUND = 2  # Nachbarwochen, Wochen-API, HTML-Fallback
+
+_PRIORITY: contextvars.ContextVar[int] = contextvars.ContextVar("stundenplan24_request_priority", default=PRIORITY_NORMAL)
+
+
+@contextlib.contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Run requests started in this block (and in tasks created from it) with priority."""
+    token = _PRIORITY.set(int(priority))
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def current_priority() -> int:
+    return _PRIORITY.get()
+
+
+class RequestScheduler:
+    """Per-host concurrency cap with priority ordering of the waiting requests.
+
+    Shared by all config entries, so parallel refreshes of several classes do
+    not hit www.stundenplan24.de with one big burst. When a slot frees up, the
+    waiting request with the best (lowest) priority gets it; equal priorities
+    are served first come, first served.
+    """
+
+    def __init__(self, per_host: int = MAX_REQUESTS_PER_HOST) -> None:
+        self._limit = max(1, int(per_host))
+        self._active: Dict[str, int] = {}
+        # host -> heap of (priority, seq, waiter)
+        self._waiters: Dict[str, List[Tuple[int, int, asyncio.Future]]] = {}
+        self._seq = itertools.count()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """Hold one request slot for url's host while the block runs."""
+        host = (urlsplit(url).hostname or "").lower()
+        await self._acquire(host, current_priority())
+        try:
+            yield
+        finally:
+            self._release(host)
+
+    async def _acquire(self, host: str, priority: int) -> None:
+        if self._active.get(host, 0) < self._limit and not self._waiters.get(host):
+            self._active[host] = self._active.get(host, 0) + 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters.setdefault(host, []), (priority, next(self._seq), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Slot wurde schon übergeben, der Task aber vorher abgebrochen -> weiterreichen
+            if waiter.done() and not waiter.cancelled():
+                self._release(host)
+            raise
+
+    def _release(self, host: str) -> None:
+        heap = self._waiters.get(host)
+        while heap:
+            _prio, _seq, waiter = heapq.heappop(heap)
+            if not waiter.done():
+                # Slot direkt übergeben: die Zahl aktiver Requests bleibt gleich
+                waiter.set_result(None)
+                return
+        self._waiters.pop(host, None)
+        self._active[host] = max(0, self._active.get(host, 0) - 1)
+        if not self._active[host]:
+            self._active.pop(host, None)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            host: {"active": self._active.get(host, 0), "waiting": len(self._waiters.get(host) or ())}
+            for host in set(self._active) | set(self._waiters)
+        }
+
+
+def async_get_scheduler(hass: HomeAssistant) -> RequestScheduler:
+    """Return the integration-wide request scheduler (creating it on demand)."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    scheduler = domain_data.get(DATA_SCHEDULER)
+    if scheduler is None:
+        scheduler = domain_data[DATA_SCHEDULER] = RequestScheduler()
+    return scheduler
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import json
-from typing import Any
+from typing import Any, Optional, Tuple
 
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
@@ -13,22 +13,40 @@ from .const import DOMAIN
 from .coordinator import SPlanCoordinator
 
 
+# Große Strukturen: bleiben in den Attributen, aber nicht in der Recorder-Datenbank
+_HEAVY_ATTRIBUTES = frozenset(
+    {
+        "rows",
+        "meta",
+        "rows_ha",
+        "meta_ha",
+        "rows_table",
+        "rows_json",
+        "meta_json",
+        "rows_table_json",
+    }
+)
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     coordinator: SPlanCoordinator = hass.data[DOMAIN][entry.entry_id]
-    async_add_entities([Stundenplan24WeekSensor(coordinator, entry)], update_before_add=True)
+    async_add_entities([Stundenplan24WeekSensor(coordinator, entry)])
 
 
 class Stundenplan24WeekSensor(CoordinatorEntity[SPlanCoordinator], SensorEntity):
     _attr_icon = "mdi:calendar-week"
     _attr_has_entity_name = True
+    _unrecorded_attributes = _HEAVY_ATTRIBUTES
 
     def __init__(self, coordinator: SPlanCoordinator, entry: ConfigEntry) -> None:
         super().__init__(coordinator)
         self.entry = entry
+        # (coordinator.data, attrs): Attribute/JSON nur einmal pro Datenstand bauen
+        self._attrs_cache: Optional[Tuple[Any, dict[str, Any]]] = None
 
         target = (coordinator.target or "klasse").strip()
 
@@ -56,13 +74,32 @@ class Stundenplan24WeekSensor(CoordinatorEntity[SPlanCoordinator], SensorEntity)
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         data = self.coordinator.data or {}
+        cached = self._attrs_cache
+        if cached is not None and cached[0] is data:
+            return cached[1]
 
+        attrs = self._build_attributes(data)
+        self._attrs_cache = (data, attrs)
+        return attrs
+
+    def _build_attributes(self, data: dict[str, Any]) -> dict[str, Any]:
         rows = data.get("rows") or []
         rows_table = data.get("rows_table") or []  # NEU: Legacy-Format Mo/Di/Mi/Do/Fr
 
         meta = data.get("meta") or {}
 
-        attrs: dict[str, Any] = {
+        if self.coordinator.lean_attributes:
+            # eine kanonische Struktur
+            attrs: dict[str, Any] = {
+                "rows": rows,
+                "meta": meta,
+                "data_version": self.coordinator.data_version,
+                "snapshot_saved_at": self.coordinator.snapshot_saved_at,
+            }
+            self._add_meta_shortcuts(attrs, meta)
+            return attrs
+
+        attrs = {
             # neues Format
             "rows": rows,
             "meta": meta,
@@ -73,6 +110,11 @@ class Stundenplan24WeekSensor(CoordinatorEntity[SPlanCoordinator], SensorEntity)
 
             # Legacy: Card-Source-Modus erwartet Keys "Mo".."Fr"
             "rows_table": rows_table,
+
+            # Wochen-API (week_api.py): Karten laden nur bei neuer Version nach
+            "data_version": self.coordinator.data_version,
+            # letzte Änderung des Plans (auch über Neustarts hinweg)
+            "snapshot_saved_at": self.coordinator.snapshot_saved_at,
         }
 
         # JSON-Strings (manche Karten/Templating nutzen lieber Strings)
@@ -91,10 +133,13 @@ class Stundenplan24WeekSensor(CoordinatorEntity[SPlanCoordinator], SensorEntity)
         except Exception:
             attrs["rows_table_json"] = "[]"
 
+        self._add_meta_shortcuts(attrs, meta)
+        return attrs
+
+    @staticmethod
+    def _add_meta_shortcuts(attrs: dict[str, Any], meta: Any) -> None:
         # Bequeme “Meta”-Attribute oben rausziehen
         if isinstance(meta, dict):
             for k in ("week_start", "days", "class", "school_id", "no_plan"):
                 if k in meta:
                     attrs[k] = meta.get(k)
-
-        return attrs
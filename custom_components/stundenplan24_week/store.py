@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import slugify
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+# Verzögerung, mit der Änderungen gebündelt auf die Platte geschrieben werden
+SNAPSHOT_SAVE_DELAY = 10
+RESPONSE_CACHE_SAVE_DELAY = 60
+
+# Wie viele Roh-Antworten (zuletzt genutzte URLs) pro Schule persistiert werden
+PERSISTED_RESPONSES = 96
+
+
+class SnapshotStore:
+    """Last good coordinator payload of one config entry.
+
+    Lets the integration publish the plan right after a Home Assistant restart
+    (or while stundenplan24.de is unreachable) and refresh in the background.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.snapshot_{entry_id}")
+
+    async def async_load(self) -> Optional[Dict[str, Any]]:
+        try:
+            raw = await self._store.async_load()
+        except Exception as err:
+            _LOGGER.debug("Snapshot load failed: %s", err)
+            return None
+        if not isinstance(raw, dict) or not isinstance(raw.get("data"), dict):
+            return None
+        return raw
+
+    def async_save(self, data: Dict[str, Any], week_offset: int) -> str:
+        """Schedule writing data; returns its saved_at stamp."""
+        saved_at = datetime.now().isoformat(timespec="seconds")
+        payload = {
+            "saved_at": saved_at,
+            "week_offset": int(week_offset),
+            "data": data,
+        }
+        self._store.async_delay_save(lambda: payload, SNAPSHOT_SAVE_DELAY)
+        return saved_at
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
+
+
+class ResponseCacheStore:
+    """Raw per-URL responses (body + ETag/Last-Modified) and known SPlanKl_SwNN files of one school."""
+
+    def __init__(self, hass: HomeAssistant, school_id: str, username: str) -> None:
+        key = f"{DOMAIN}.responses_{slugify(school_id) or 'school'}_{slugify(username) or 'user'}"
+        self._store: Store = Store(hass, STORAGE_VERSION, key)
+
+    async def async_load(self) -> Dict[str, Any]:
+        """{"responses": [...], "school_weeks": {...}} (empty parts when missing/invalid)."""
+        try:
+            raw = await self._store.async_load()
+        except Exception as err:
+            _LOGGER.debug("Response cache load failed: %s", err)
+            raw = None
+        if not isinstance(raw, dict):
+            raw = {}
+        responses = raw.get("responses") if isinstance(raw.get("responses"), list) else []
+        school_weeks = raw.get("school_weeks") if isinstance(raw.get("school_weeks"), dict) else {}
+        return {"responses": [r for r in responses if isinstance(r, dict)], "school_weeks": school_weeks}
+
+    def async_schedule_save(self, provider: Callable[[], Dict[str, Any]]) -> None:
+        self._store.async_delay_save(provider, RESPONSE_CACHE_SAVE_DELAY)
@@ -1,14 +1,83 @@
 from __future__ import annotations
 
 import asyncio
-import time
+import contextlib
+import contextvars
 import datetime as _dt
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncContextManager, Dict, Iterator, List, Optional
+
 import aiohttp
 
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
+from .resilience import (
+    MAX_ATTEMPTS,
+    MAX_RETRY_AFTER,
+    RETRY_STATUSES,
+    CircuitBreaker,
+    CircuitOpenError,
+    backoff_delay,
+    endpoint_family,
+    parse_retry_after,
+)
+from .scheduler import RequestScheduler
+from .ttl_cache import TtlLruCache
+
 BASE = "https://www.stundenplan24.de"
 
+# Max. Anzahl URLs, für die ETag/Last-Modified + Body gemerkt werden (LRU).
+VALIDATOR_CACHE_SIZE = 512
+
+# Negativ-Cache für 404/410: max. Anzahl URLs und TTLs in Sekunden
+MISSING_CACHE_SIZE = 512
+MISSING_TTL_SOON = 15 * 60  # Datei für heute/morgen: kann jederzeit erscheinen
+MISSING_TTL_PER_DAY = 3600  # je weiterem Tag in der Zukunft eine Stunde länger
+MISSING_TTL_MAX = 12 * 3600
+MISSING_TTL_UNDATED = 3600  # z.B. SPlanKl_SwNN.xml, Schule ohne WPlanKl_*.xml
+
+_RE_URL_DATE = re.compile(r"(\d{8})\.xml", re.IGNORECASE)
+
+# Pro Refresh: url -> Future mit dem Body (bzw. dem Fehler). Als ContextVar, weil
+# die Api über den SchoolHub von mehreren Coordinatoren geteilt wird und Tasks,
+# die innerhalb eines Refreshs entstehen, den Kontext (und damit das Memo) erben.
+_REFRESH_MEMO: contextvars.ContextVar[Optional[Dict[str, asyncio.Future]]] = contextvars.ContextVar(
+    "stundenplan24_refresh_memo", default=None
+)
+
+class NotFoundError(RuntimeError):
+    """The server answered 404/410 for url (possibly remembered from an earlier request)."""
+
+    status = 404
+
+    def __init__(self, url: str) -> None:
+        super().__init__(f"Nicht gefunden: {url}")
+        self.url = url
+
+
+def missing_ttl(url: str, today: Optional[_dt.date] = None) -> float:
+    """How long a 404 for url stays trusted, based on the YYYYMMDD day in the file name.
+
+    Files for today/tomorrow are rechecked often, files far ahead rarely and
+    files for past days hardly ever (they will not be published anymore).
+    """
+    m = _RE_URL_DATE.search(url or "")
+    if not m:
+        return MISSING_TTL_UNDATED
+    try:
+        day = _dt.datetime.strptime(m.group(1), "%Y%m%d").date()
+    except ValueError:
+        return MISSING_TTL_UNDATED
+    days_ahead = (day - (today or _dt.date.today())).days
+    if days_ahead < 0:
+        return MISSING_TTL_MAX
+    if days_ahead <= 1:
+        return MISSING_TTL_SOON
+    return min(MISSING_TTL_MAX, (days_ahead - 1) * MISSING_TTL_PER_DAY)
+
+
 def ymd(day) -> str:
     """Return YYYYMMDD for various day representations (date/datetime/str)."""
     if day is None:
@@ -22,6 +91,15 @@ def ymd(day) -> str:
         return digits[:8]
     return s
 
+@dataclass
+class CachedResponse:
+    """Last 200 response of a URL together with its HTTP validators."""
+
+    body: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
 class Stundenplan24Api:
     """HTTP client for Stundenplan24 endpoints.
 
@@ -33,10 +111,70 @@ class Stundenplan24Api:
       - fetch_wplan_html
     """
 
-    def __init__(self, hass, username: str, password: str, timeout_s: int = 25) -> None:
+    def __init__(
+        self,
+        hass,
+        username: str,
+        password: str,
+        timeout_s: int = 25,
+        scheduler: Optional[RequestScheduler] = None,
+    ) -> None:
         self._hass = hass
         self._auth = aiohttp.BasicAuth(username, password)
         self._timeout = aiohttp.ClientTimeout(total=timeout_s)
+        # Gemeinsamer Scheduler (Host-Limit + Prioritäten); None = ungedrosselt
+        self._scheduler = scheduler
+        # Endpunkt-Familie (mobil, vplan, wplan, plan_html) -> Circuit Breaker
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        # url -> True für bekannte 404/410 (TTL hängt vom Datum im Dateinamen ab)
+        self._missing: TtlLruCache[str, bool] = TtlLruCache(maxsize=MISSING_CACHE_SIZE, ttl=MISSING_TTL_UNDATED)
+        # url -> CachedResponse (für If-None-Match / If-Modified-Since)
+        self._validators: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        # True, sobald sich ein Body/Validator geändert hat (Hub persistiert nur dann)
+        self.responses_dirty = False
+
+    def cached_response(self, url: str) -> Optional[CachedResponse]:
+        return self._validators.get(url)
+
+    def export_responses(self, limit: int) -> List[Dict[str, Any]]:
+        """Most recently used cached responses (newest last), JSON-serializable."""
+        items = list(self._validators.items())[-max(0, int(limit)):] if limit else []
+        return [
+            {"url": url, "body": c.body, "etag": c.etag, "last_modified": c.last_modified}
+            for url, c in items
+        ]
+
+    def import_responses(self, responses: List[Dict[str, Any]]) -> None:
+        """Seed the validator cache (e.g. from disk, oldest first); existing entries win."""
+        # rückwärts einfügen und jeweils nach vorne schieben -> Reihenfolge bleibt erhalten
+        dirty = self.responses_dirty
+        for r in reversed(responses):
+            url = r.get("url")
+            body = r.get("body")
+            if not url or not isinstance(body, str) or url in self._validators:
+                continue
+            self._remember(url, body, r.get("etag"), r.get("last_modified"))
+            if url in self._validators:
+                self._validators.move_to_end(url, last=False)
+        # Stand von der Platte ist nichts Neues
+        self.responses_dirty = dirty
+
+    def _remember(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        if not etag and not last_modified:
+            # ohne Validatoren kann der Server nie 304 liefern -> nichts merken
+            self._forget(url)
+            return
+        entry = CachedResponse(body=body, etag=etag, last_modified=last_modified)
+        if self._validators.get(url) != entry:
+            self._validators[url] = entry
+            self.responses_dirty = True
+        self._validators.move_to_end(url)
+        while len(self._validators) > VALIDATOR_CACHE_SIZE:
+            self._validators.popitem(last=False)
+
+    def _forget(self, url: str) -> None:
+        if self._validators.pop(url, None) is not None:
+            self.responses_dirty = True
 
     def _base_headers(self) -> dict[str, str]:
         # Stundenplan24 blocks some requests unless they look like a browser.
@@ -51,7 +189,61 @@ class Stundenplan24Api:
             "Cache-Control": "no-cache",
         }
 
+    @contextlib.contextmanager
+    def refresh_scope(self) -> Iterator[Dict[str, asyncio.Future]]:
+        """Request each distinct URL at most once while the scope is active.
+
+        Nested scopes reuse the outer memo, so a refresh triggered from within
+        another refresh does not refetch anything.
+        """
+        memo = _REFRESH_MEMO.get()
+        if memo is not None:
+            yield memo
+            return
+        memo = {}
+        token = _REFRESH_MEMO.set(memo)
+        try:
+            yield memo
+        finally:
+            _REFRESH_MEMO.reset(token)
+            for fut in memo.values():
+                # Fehler, die keiner mehr abholt, nicht als "never retrieved" loggen
+                if fut.done() and not fut.cancelled():
+                    fut.exception()
+
     async def fetch_text(self, url: str, *, referer: str | None = None, xhr: bool = False) -> str:
+        memo = _REFRESH_MEMO.get()
+        if memo is None:
+            return await self._fetch_text(url, referer=referer, xhr=xhr)
+
+        fut = memo.get(url)
+        if fut is None:
+            # Auch Fehler (z.B. 404) werden für den Rest des Refreshs gemerkt
+            fut = asyncio.ensure_future(self._fetch_text(url, referer=referer, xhr=xhr))
+            memo[url] = fut
+        return await asyncio.shield(fut)
+
+    def _breaker(self, url: str) -> CircuitBreaker:
+        family = endpoint_family(url)
+        breaker = self._breakers.get(family)
+        if breaker is None:
+            breaker = self._breakers[family] = CircuitBreaker()
+        return breaker
+
+    def breaker_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {family: b.stats() for family, b in self._breakers.items()}
+
+    def _slot(self, url: str) -> AsyncContextManager[None]:
+        """Request slot from the shared scheduler (waits while the host is busy)."""
+        if self._scheduler is None:
+            return contextlib.nullcontext()
+        return self._scheduler.slot(url)
+
+    async def _fetch_text(self, url: str, *, referer: str | None = None, xhr: bool = False) -> str:
+        if self._missing.get(url):
+            # bekannt fehlende Datei -> ohne Request abbrechen
+            raise NotFoundError(url)
+
         session = async_get_clientsession(self._hass)
         headers = self._base_headers()
         if referer:
@@ -59,29 +251,83 @@ class Stundenplan24Api:
         if xhr:
             headers["X-Requested-With"] = "XMLHttpRequest"
 
+        # Conditional request: der Server antwortet mit 304, wenn sich nichts geändert hat.
+        # "Cache-Control: no-cache" bleibt gesetzt, damit Zwischen-Caches beim Origin revalidieren.
+        cached = self._validators.get(url)
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        breaker = self._breaker(url)
         last_err: Exception | None = None
-        for _ in range(2):  # retry once
+        delay = 0.0
+        for attempt in range(MAX_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(delay)
+            if not breaker.allow():
+                # Endpunkt-Familie gestört -> sofort den letzten Stand liefern statt zu warten
+                if cached is not None:
+                    return cached.body
+                raise CircuitOpenError(f"{endpoint_family(url)} endpoints unavailable") from last_err
+            retry_after: Optional[float] = None
             try:
-                async with session.get(
+                async with self._slot(url), session.get(
                     url,
                     auth=self._auth,
                     timeout=self._timeout,
                     headers=headers,
                 ) as resp:
+                    if resp.status == 304 and cached is not None:
+                        breaker.record_success()
+                        self._validators.move_to_end(url)
+                        # gleicher Inhalt -> der Parse-Cache liefert das Ergebnis ohne erneutes Parsen
+                        return cached.body
+                    if resp.status in RETRY_STATUSES:
+                        retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                        resp.raise_for_status()
+                    if resp.status >= 500:
+                        resp.raise_for_status()
+                    # 4xx ist eine gültige Antwort des Servers (z.B. 404 = Datei fehlt): kein Retry
+                    breaker.record_success()
                     resp.raise_for_status()
-                    return await resp.text()
+                    body = await resp.text()
+                    self._remember(url, body, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+                    return body
+            except aiohttp.ClientResponseError as e:
+                if e.status in (404, 410):
+                    self._forget(url)
+                    self._missing.set(url, True, ttl=missing_ttl(url))
+                    raise NotFoundError(url) from e
+                if e.status not in RETRY_STATUSES and e.status < 500:
+                    raise
+                last_err = e
             except (aiohttp.ClientError, asyncio.TimeoutError) as e:
                 last_err = e
+
+            breaker.record_failure()
+            if retry_after is not None and retry_after > MAX_RETRY_AFTER:
+                # Server verlangt eine lange Pause -> Familie bis dahin nicht mehr anfragen
+                breaker.trip(retry_after)
+            if breaker.state == "open":
+                # Breaker ist (jetzt) offen: nicht erst den Backoff abwarten
+                if cached is not None:
+                    return cached.body
+                raise CircuitOpenError(f"{endpoint_family(url)} endpoints unavailable") from last_err
+            delay = backoff_delay(attempt + 1, retry_after)
         raise last_err or RuntimeError("Fetch fehlgeschlagen")
 
     # ----------------------------
     # URL builder helpers
     # ----------------------------
+    # Kein "?_=<millis>"-Cache-Buster mehr: stabile URLs sind Voraussetzung für
+    # ETag/Last-Modified-Revalidierung; "Cache-Control: no-cache" reicht gegen Proxies.
     def url_vplan_kl_xml(self, school_id: str) -> str:
-        return f"{BASE}/{school_id}/vplan/vdaten/VplanKl.xml?_={int(time.time()*1000)}"
+        return f"{BASE}/{school_id}/vplan/vdaten/VplanKl.xml"
 
     def url_vplan_kl_day_xml(self, school_id: str, day) -> str:
-        return f"{BASE}/{school_id}/vplan/vdaten/VplanKl{ymd(day)}.xml?_={int(time.time()*1000)}"
+        return f"{BASE}/{school_id}/vplan/vdaten/VplanKl{ymd(day)}.xml"
 
     def url_mobil_plan_kl_day(self, school_id: str, day) -> str:
         return f"{BASE}/{school_id}/mobil/mobdaten/PlanKl{ymd(day)}.xml"
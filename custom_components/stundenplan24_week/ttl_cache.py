@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+_K = TypeVar("_K", bound=Hashable)
+_V = TypeVar("_V")
+
+
+class TtlLruCache(Generic[_K, _V]):
+    """Small bounded cache with per-entry TTL and LRU eviction.
+
+    Expired entries are not dropped right away: get_stale() still returns them,
+    so callers can revalidate (e.g. compare a server timestamp) instead of
+    reloading from scratch.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self._maxsize = max(1, int(maxsize))
+        self._ttl = float(ttl)
+        self._clock = clock
+        # key -> (expires_at, value)
+        self._data: "OrderedDict[_K, Tuple[float, _V]]" = OrderedDict()
+
+    def __contains__(self, key: object) -> bool:
+        return self.get(key) is not None  # type: ignore[arg-type]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: _K) -> Optional[_V]:
+        """Fresh value or None (missing or expired)."""
+        hit = self._data.get(key)
+        if hit is None or hit[0] <= self._clock():
+            return None
+        self._data.move_to_end(key)
+        return hit[1]
+
+    def get_stale(self, key: _K) -> Optional[_V]:
+        """Value regardless of its TTL (None if missing)."""
+        hit = self._data.get(key)
+        return hit[1] if hit is not None else None
+
+    def set(self, key: _K, value: _V, ttl: Optional[float] = None) -> _V:
+        self._data[key] = (self._clock() + (self._ttl if ttl is None else float(ttl)), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+        return value
+
+    def touch(self, key: _K, ttl: Optional[float] = None) -> None:
+        """Extend the lifetime of an existing entry (after a successful revalidation)."""
+        hit = self._data.get(key)
+        if hit is not None:
+            self.set(key, hit[1], ttl)
+
+    def pop(self, key: _K) -> Optional[_V]:
+        hit = self._data.pop(key, None)
+        return hit[1] if hit is not None else None
+
+    def clear(self) -> None:
+        self._data.clear()
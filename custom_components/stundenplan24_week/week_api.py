@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Tuple
+
+import voluptuous as vol
+from aiohttp import web
+
+from homeassistant.components import websocket_api
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_API, DOMAIN
+from .coordinator import SPlanCoordinator, monday_of_week, ymd
+from .ttl_cache import TtlLruCache
+
+# Wochendaten auf Abruf statt als riesige Sensor-Attribute:
+#   GET  /api/stundenplan24_week/<entry_id>/weeks?week=2024-09-02
+#   GET  /api/stundenplan24_week/<entry_id>/weeks?start=2024-09-02&end=2024-09-20
+#   WS   {"type": "stundenplan24_week/weeks", "entry_id": ..., "week"|"start"/"end": ..., "etag": ...}
+# Beide liefern {"entry_id", "class", "data_version", "etag", "weeks": [...], "missing": [...]}
+# aus dem Wochen-Cache des Coordinators; noch nie berechnete Wochen werden dabei
+# einmalig gemergt, veraltete im Hintergrund revalidiert.
+
+URL_WEEKS = "/api/stundenplan24_week/{entry_id}/weeks"
+WS_TYPE_WEEKS = f"{DOMAIN}/weeks"
+
+# Höchstens so viele Wochen pro Anfrage (mehr hält der Wochen-Cache ohnehin nicht)
+MAX_WEEKS_PER_REQUEST = 12
+
+# Serialisierte Antworten: Schlüssel enthält die computed_at-Stempel der Wochen,
+# neu berechnete Wochen ergeben also automatisch einen neuen Eintrag
+_PAYLOAD_CACHE_SIZE = 32
+_PAYLOAD_TTL = 6 * 3600
+_payloads: TtlLruCache[Tuple[Any, ...], Tuple[str, bytes, Dict[str, Any]]] = TtlLruCache(
+    maxsize=_PAYLOAD_CACHE_SIZE, ttl=_PAYLOAD_TTL
+)
+
+
+class RangeError(ValueError):
+    """Invalid week/start/end parameters."""
+
+
+def _parse_day(value: Optional[str]) -> Optional[datetime]:
+    value = (value or "").strip()
+    if not value:
+        return None
+    # ISO-Datum oder das week_start-Format aus meta (YYYYMMDD)
+    for fmt in ("%Y-%m-%d", "%Y%m%d"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise RangeError(f"invalid date {value!r} (expected YYYY-MM-DD)")
+
+
+def requested_mondays(
+    coordinator: SPlanCoordinator,
+    week: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> List[datetime]:
+    """Mondays of the requested week / date range (default: the selected week)."""
+    day = _parse_day(week)
+    if day is not None:
+        return [monday_of_week(day)]
+
+    first = _parse_day(start)
+    last = _parse_day(end)
+    if first is None and last is None:
+        return [coordinator.selected_monday()]
+    first = monday_of_week(first or last)
+    last = monday_of_week(last or first)
+    if last < first:
+        raise RangeError("end before start")
+    count = (last - first).days // 7 + 1
+    if count > MAX_WEEKS_PER_REQUEST:
+        raise RangeError(f"at most {MAX_WEEKS_PER_REQUEST} weeks per request")
+    return [first + timedelta(weeks=i) for i in range(count)]
+
+
+def _week_model(week: Any) -> Dict[str, Any]:
+    return {
+        "week_start": ymd(week.monday),
+        "days": [ymd(d) for d in week.day_dates],
+        "live": week.live,
+        "has_data": week.has_data,
+        "rows": week.rows,
+        "exact_cells_by_date_time": week.exact_cells_by_date_time(),
+        "updated_by_date": week.updated_by_date(),
+        "available_by_date": week.available_by_date(),
+    }
+
+
+async def async_weeks_payload(
+    coordinator: SPlanCoordinator, mondays: List[datetime]
+) -> Tuple[str, bytes, Dict[str, Any]]:
+    """(etag, gzip-able JSON body, payload) for the given weeks, memoized per week version."""
+    # fehlende Wochen parallel mergen (gebremst durch den Request-Scheduler)
+    loaded = await asyncio.gather(*(coordinator.async_get_week(monday) for monday in mondays))
+    weeks = list(zip(mondays, loaded))
+    key = (
+        coordinator.entry.entry_id,
+        coordinator.data_version,
+        tuple((ymd(m), w.computed_at if w is not None else None) for m, w in weeks),
+    )
+    cached = _payloads.get(key)
+    if cached is not None:
+        return cached
+
+    weeks_body = [_week_model(w) for _m, w in weeks if w is not None]
+    missing = [ymd(m) for m, w in weeks if w is None]
+    # ETag nur über den Inhalt: neu gemergte, aber gleiche Wochen bleiben 304
+    content = json.dumps([weeks_body, missing], sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    etag = hashlib.blake2b(content.encode("utf-8"), digest_size=12).hexdigest()
+
+    payload: Dict[str, Any] = {
+        "entry_id": coordinator.entry.entry_id,
+        "class": coordinator.target,
+        "data_version": coordinator.data_version,
+        "etag": etag,
+        "weeks": weeks_body,
+        "missing": missing,
+    }
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _payloads.set(key, (etag, body, payload))
+
+
+def _coordinator(hass: HomeAssistant, entry_id: str) -> Optional[SPlanCoordinator]:
+    coordinator = hass.data.get(DOMAIN, {}).get(entry_id)
+    return coordinator if isinstance(coordinator, SPlanCoordinator) else None
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    tags = [t.strip().removeprefix("W/").strip('"') for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+class WeeksView(HomeAssistantView):
+    """Week models of one config entry with ETag revalidation and gzip."""
+
+    url = URL_WEEKS
+    name = f"api:{DOMAIN}:weeks"
+    requires_auth = True
+
+    async def get(self, request: web.Request, entry_id: str) -> web.Response:
+        hass: HomeAssistant = request.app["hass"]
+        coordinator = _coordinator(hass, entry_id)
+        if coordinator is None:
+            return self.json_message("Unknown entry", HTTPStatus.NOT_FOUND)
+
+        query = request.query
+        try:
+            mondays = requested_mondays(coordinator, query.get("week"), query.get("start"), query.get("end"))
+        except RangeError as err:
+            return self.json_message(str(err), HTTPStatus.BAD_REQUEST)
+
+        etag, body, _payload = await async_weeks_payload(coordinator, mondays)
+        headers = {"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"}
+        if _etag_matches(request.headers.get("If-None-Match"), etag):
+            return web.Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+        response = web.Response(body=body, content_type="application/json", charset="utf-8", headers=headers)
+        # gzip/deflate je nach Accept-Encoding des Clients
+        response.enable_compression()
+        return response
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): WS_TYPE_WEEKS,
+        vol.Required("entry_id"): str,
+        vol.Optional("week"): str,
+        vol.Optional("start"): str,
+        vol.Optional("end"): str,
+        vol.Optional("etag"): str,
+    }
+)
+@websocket_api.async_response
+async def ws_weeks(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: Dict[str, Any]) -> None:
+    """Week models from the cache; {"not_modified": true} if the client's etag still matches."""
+    coordinator = _coordinator(hass, msg["entry_id"])
+    if coordinator is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Unknown entry")
+        return
+    try:
+        mondays = requested_mondays(coordinator, msg.get("week"), msg.get("start"), msg.get("end"))
+    except RangeError as err:
+        connection.send_error(msg["id"], websocket_api.ERR_INVALID_FORMAT, str(err))
+        return
+
+    etag, _body, payload = await async_weeks_payload(coordinator, mondays)
+    if msg.get("etag") == etag:
+        connection.send_result(msg["id"], {"etag": etag, "data_version": coordinator.data_version, "not_modified": True})
+        return
+    connection.send_result(msg["id"], payload)
+
+
+@callback
+def async_register_api(hass: HomeAssistant) -> None:
+    """Register the HTTP view and the WebSocket command once per HA instance."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if domain_data.get(DATA_API):
+        return
+    hass.http.register_view(WeeksView())
+    websocket_api.async_register_command(hass, ws_weeks)
+    domain_data[DATA_API] = True
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import re
+import xml.etree.ElementTree as _ET
+from typing import AbstractSet, Any, Iterator, List, Tuple
+
+# Parser-Backend: lxml wenn installiert, sonst ElementTree aus der Stdlib. Beide
+# liefern Elemente mit der ElementTree-API (find/findall/findtext/itertext/...)
+# verwerfen Kommentare/Processing Instructions, lösen interne DTD-Entities auf
+# und tolerieren BOM/Leerraum vor der XML-Deklaration -> identische Ergebnisse.
+
+try:  # optional, deutlich schneller (C-Parser, Tag-Filter im iterparse)
+    from lxml import etree as _LXML
+except ImportError:  # pragma: no cover - abhängig von der Installation
+    _LXML = None
+
+BACKEND = "lxml" if _LXML is not None else "etree"
+
+# Häppchengröße für den Streaming-Parser (Zeichen)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Prolog vor dem ersten Tag: lxml lehnt str mit encoding-Deklaration ab, expat
+# Leerraum vor der Deklaration. Der Text ist bereits dekodiert -> für beide weg.
+_RE_PROLOG = re.compile(r"^\ufeff?\s*(?:<\?xml[^>]*\?>)?")
+
+# Interne Entities wie expat auflösen, externe (Dateien/URLs) nie: "internal" gibt
+# es erst ab lxml 5; ältere Versionen behalten die Entity-Referenzen.
+_LXML_RESOLVE_ENTITIES = "internal" if _LXML is not None and _LXML.LXML_VERSION >= (5,) else False
+
+if _LXML is not None:
+    ParseError: Tuple[type, ...] = (_ET.ParseError, _LXML.XMLSyntaxError)
+else:
+    ParseError = (_ET.ParseError,)
+
+
+def _strip_prolog(xml_text: str) -> str:
+    return _RE_PROLOG.sub("", xml_text, count=1)
+
+
+def _lxml_parser_kwargs() -> dict:
+    return {
+        "remove_comments": True,
+        "remove_pis": True,
+        "resolve_entities": _LXML_RESOLVE_ENTITIES,
+        "no_network": True,
+    }
+
+
+def fromstring(xml_text: str) -> Any:
+    """Parse a complete document from str."""
+    if _LXML is not None:
+        return _LXML.fromstring(_strip_prolog(xml_text), _LXML.XMLParser(**_lxml_parser_kwargs()))
+    return _ET.fromstring(_strip_prolog(xml_text))
+
+
+def iter_elements(xml_text: str, tags: AbstractSet[str]) -> Iterator[Tuple[str, Any]]:
+    """
+    Streamt (parent_tag, element) für jedes fertig gelesene Element mit Tag in `tags`,
+    ohne den kompletten Baum der Schule aufzubauen.
+
+    Nach der Rückgabe an den Aufrufer wird das Element geleert und aus dem Baum
+    gelöst; ebenso jedes fertige Kind des Wurzelelements. Der Speicherbedarf ist
+    damit durch einen Klassen-Teilbaum begrenzt. Bricht der Aufrufer die
+    Schleife ab, wird der Rest der Datei gar nicht mehr geparst.
+    `tags` dürfen nicht ineinander geschachtelt vorkommen.
+    """
+    if _LXML is not None:
+        yield from _iter_elements_lxml(_strip_prolog(xml_text), tags)
+    else:
+        yield from _iter_elements_etree(_strip_prolog(xml_text), tags)
+
+
+def _iter_elements_etree(xml_text: str, tags: AbstractSet[str]) -> Iterator[Tuple[str, Any]]:
+    parser = _ET.XMLPullParser(events=("start", "end"))
+    stack: List[Any] = []
+    for pos in range(0, len(xml_text), STREAM_CHUNK_SIZE):
+        parser.feed(xml_text[pos : pos + STREAM_CHUNK_SIZE])
+        for event, elem in parser.read_events():
+            if event == "start":
+                stack.append(elem)
+                continue
+            stack.pop()
+            parent = stack[-1] if stack else None
+            if elem.tag in tags:
+                yield (parent.tag if parent is not None else ""), elem
+            elif len(stack) != 1:
+                continue
+            elem.clear()
+            if parent is not None:
+                parent.remove(elem)
+    parser.close()
+
+
+def _iter_elements_lxml(xml_text: str, tags: AbstractSet[str]) -> Iterator[Tuple[str, Any]]:
+    # Tag-Filter im C-Parser: nur die gesuchten Elemente erzeugen Events
+    parser = _LXML.XMLPullParser(events=("end",), tag=sorted(tags), **_lxml_parser_kwargs())
+    for pos in range(0, len(xml_text), STREAM_CHUNK_SIZE):
+        parser.feed(xml_text[pos : pos + STREAM_CHUNK_SIZE])
+        for _event, elem in parser.read_events():
+            parent = elem.getparent()
+            yield (parent.tag if parent is not None else ""), elem
+            elem.clear(keep_tail=False)
+            # fertige Geschwister (auch die der Vorfahren) freigeben
+            node = elem
+            while node is not None:
+                up = node.getparent()
+                if up is None:
+                    break
+                while node.getprevious() is not None:
+                    del up[0]
+                node = up
+    parser.close()
@@ -0,0 +1,36 @@
+from custom_components.stundenplan24_week.parser_wplan import (
+    index_wplan_day_xml_lessons,
+    parse_wplan_day_xml_lessons,
+)
+
+
+def _kl(kurz: str, first: int) -> str:
+    stunden = "".join(
+        f"<Std><St>{st}</St><Beginn>0{7 + st}:00</Beginn><Ende>0{7 + st}:45</Ende>"
+        f"<Fa>MA</Fa><Le>Mü</Le><Ra>10{st}</Ra></Std>"
+        for st in range(first, first + 3)
+    )
+    return f"<Kl><Kurz>{kurz}</Kurz><Pl>{stunden}</Pl></Kl>"
+
+
+# 5a kommt zweimal vor, dazwischen eine andere Klasse
+DUPLICATE_BLOCKS_XML = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    "<WplanVp><Klassen>" + _kl("5a", 1) + _kl("6b", 1) + _kl("5a", 4) + "</Klassen></WplanVp>"
+)
+
+
+def test_index_keeps_non_adjacent_duplicate_blocks() -> None:
+    lessons = index_wplan_day_xml_lessons(DUPLICATE_BLOCKS_XML)["5a"]
+    assert [lesson[0] for lesson in lessons] == [1, 2, 3, 4, 5, 6]
+
+
+def test_index_with_wanted_keeps_non_adjacent_duplicate_blocks() -> None:
+    index = index_wplan_day_xml_lessons(DUPLICATE_BLOCKS_XML, frozenset({"5a"}))
+    assert [lesson[0] for lesson in index["5a"]] == [1, 2, 3, 4, 5, 6]
+    assert "6b" not in index
+
+
+def test_single_class_keeps_non_adjacent_duplicate_blocks() -> None:
+    lessons = parse_wplan_day_xml_lessons(DUPLICATE_BLOCKS_XML, "5a")
+    assert [lesson[0] for lesson in lessons] == [1, 2, 3, 4, 5, 6]
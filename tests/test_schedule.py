@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from custom_components.stundenplan24_week.schedule import (
+    DAY_MINUTES,
+    DEFAULT_LESSON_WINDOW,
+    next_poll_interval,
+)
+
+# Mittwoch, Schultag (ohne Kalender zählt jeder Wochentag)
+SCHOOL_DAY = datetime(2026, 9, 16)
+
+
+def _polls_per_day(base: int) -> int:
+    """Adaptive poll steps from 00:00 of SCHOOL_DAY; the last one ends after midnight."""
+    now = SCHOOL_DAY
+    end = SCHOOL_DAY + timedelta(days=1)
+    polls = 0
+    while now < end:
+        now += next_poll_interval(now, base)
+        polls += 1
+    return polls
+
+
+@pytest.mark.parametrize("base", [5, 10, 15, 30])
+def test_short_base_is_never_slowed_down_in_fast_phases(base: int) -> None:
+    first, last = DEFAULT_LESSON_WINDOW
+    morning = SCHOOL_DAY + timedelta(minutes=first - 30)
+    lessons = SCHOOL_DAY + timedelta(minutes=first + 60)
+    evening = SCHOOL_DAY + timedelta(minutes=last + 30)
+
+    assert next_poll_interval(morning, base) <= timedelta(minutes=base)
+    assert next_poll_interval(lessons, base) <= timedelta(minutes=base)
+    # abends seltener, aber höchstens um den Faktor 4
+    assert next_poll_interval(evening, base) <= timedelta(minutes=4 * base)
+
+
+def test_five_minute_base_polls_every_five_minutes_during_lessons() -> None:
+    first, _last = DEFAULT_LESSON_WINDOW
+    lessons = SCHOOL_DAY + timedelta(minutes=first + 60)
+    assert next_poll_interval(lessons, 5) == timedelta(minutes=5)
+
+
+@pytest.mark.parametrize("base", [5, 10, 15, 30, 60, 120, 360, 720, 1440])
+def test_school_day_stays_within_daily_budget(base: int) -> None:
+    # +1: der Schritt über Mitternacht gehört schon zum nächsten Tag
+    assert _polls_per_day(base) <= max(1, DAY_MINUTES // base) + 1
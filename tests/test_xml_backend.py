@@ -0,0 +1,93 @@
+import dataclasses
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from custom_components.stundenplan24_week import parser, parser_wdatenk, parser_wplan, xml_backend
+from custom_components.stundenplan24_week.parser import class_key
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# Ausgaben des ursprünglichen ElementTree/findall-Parsers für dieselben Fixtures
+EXPECTED = json.loads((FIXTURES / "expected_baseline.json").read_text("utf-8"))
+
+# name: (Modul, Funktion, Fixture, weitere Argumente)
+CASES = {
+    "plan_05a": ("parser", "parse_plan_klassen_xml", "PlanKl20260914.xml", ("05a",)),
+    "plan_9c": ("parser", "parse_plan_klassen_xml", "PlanKl20260914.xml", ("9c",)),
+    "plan_unknown": ("parser", "parse_plan_klassen_xml", "PlanKl20260914.xml", ("7b",)),
+    "wplan_day_5a": ("parser_wplan", "parse_wplan_day_xml_lessons", "WPlanKl_20260914.xml", ("5a",)),
+    "wplan_day_9c": ("parser_wplan", "parse_wplan_day_xml_lessons", "WPlanKl_20260914.xml", ("9c",)),
+    "wplan_5a": ("parser_wplan", "parse_wplan_xml", "WPlanKl20260914.xml", ("5a",)),
+    "wplan_9c": ("parser_wplan", "parse_wplan_xml", "WPlanKl20260914.xml", ("9c",)),
+    "basis": ("parser_wdatenk", "parse_basis", "SPlanKl_Basis.xml", ()),
+    "splan_9c": ("parser_wdatenk", "parse_weekplan_splan", "SPlanKl_Sw1.xml", ("9c", True, True)),
+    "splan_05a": ("parser_wdatenk", "parse_weekplan_splan", "SPlanKl_Sw1.xml", ("05a", False, True)),
+}
+
+MODULES = {"parser": parser, "parser_wplan": parser_wplan, "parser_wdatenk": parser_wdatenk}
+
+# Vor der XML-Deklaration: nichts, Leerraum (manche Server), BOM
+PROLOGS = {"plain": "", "whitespace": "\r\n  ", "bom": "﻿"}
+
+
+def normalize(value: Any) -> Any:
+    """JSON-comparable form: tuples -> lists, tuple-keyed dicts -> sorted pairs."""
+    if dataclasses.is_dataclass(value):
+        return normalize(dataclasses.asdict(value))
+    if isinstance(value, dict):
+        if all(isinstance(k, str) for k in value):
+            return {k: normalize(v) for k, v in value.items()}
+        return sorted([normalize(k), normalize(v)] for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    return value
+
+
+def run_case(modules: dict, name: str, prolog: str = "") -> Any:
+    module, func, fixture, args = CASES[name]
+    xml_text = prolog + (FIXTURES / fixture).read_text("utf-8")
+    return normalize(getattr(modules[module], func)(xml_text, *args))
+
+
+@pytest.fixture(params=["lxml", "etree"])
+def backend(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    if request.param == "lxml" and xml_backend._LXML is None:
+        pytest.skip("lxml not installed")
+    if request.param == "etree":
+        monkeypatch.setattr(xml_backend, "_LXML", None)
+    return request.param
+
+
+@pytest.mark.parametrize("prolog", PROLOGS.values(), ids=PROLOGS.keys())
+@pytest.mark.parametrize("case", CASES)
+def test_matches_baseline_parser(backend: str, case: str, prolog: str) -> None:
+    assert run_case(MODULES, case, prolog) == EXPECTED[case]
+
+
+@pytest.mark.parametrize("prolog", PROLOGS.values(), ids=PROLOGS.keys())
+def test_indexes_match_baseline_parser(backend: str, prolog: str) -> None:
+    plan = prolog + (FIXTURES / "PlanKl20260914.xml").read_text("utf-8")
+    index = parser.index_plan_klassen_xml(plan)
+    assert normalize(index[class_key("05a")]) == EXPECTED["plan_05a"]
+    assert normalize(index[class_key("9c")]) == EXPECTED["plan_9c"]
+
+    day = prolog + (FIXTURES / "WPlanKl_20260914.xml").read_text("utf-8")
+    index = parser_wplan.index_wplan_day_xml_lessons(day)
+    assert normalize(index["5a"]) == EXPECTED["wplan_day_5a"]
+    assert normalize(index["9c"]) == EXPECTED["wplan_day_9c"]
+
+    week = prolog + (FIXTURES / "WPlanKl20260914.xml").read_text("utf-8")
+    index = parser_wplan.index_wplan_xml(week)
+    assert normalize(index["5a"]) == EXPECTED["wplan_5a"]
+    assert normalize(index["9c"]) == EXPECTED["wplan_9c"]
+
+
+def test_streaming_matches_tree(backend: str) -> None:
+    xml_text = "\n " + (FIXTURES / "PlanKl20260914.xml").read_text("utf-8")
+    streamed = [(parent, el.findtext("Kurz")) for parent, el in xml_backend.iter_elements(xml_text, {"Kl"})]
+    root = xml_backend.fromstring(xml_text)
+    assert streamed == [("Klassen", kl.findtext("Kurz")) for kl in root.iter("Kl")]
+    assert streamed == [("Klassen", "05a"), ("Klassen", "9c"), ("Klassen", "9c")]